@@ -1,4 +1,5 @@
 import pygame as pg
+import shared_functions
 
 
 # Defines a button object based on two images. It is flexible enough to act as a normal or radio button.
@@ -16,12 +17,12 @@ class Button:
         self.update_center_x()
         self.update_center_y()
 
-    # Displays the appropriate button image on the screen
+    # Displays the appropriate button image on the screen and marks its area as changed
     def display(self):
         if self.clicked:
-            self.screen.blit(self.clicked_image, (self.x, self.y))
+            shared_functions.mark_dirty(self.screen.blit(self.clicked_image, (self.x, self.y)))
         else:
-            self.screen.blit(self.rest_image, (self.x, self.y))
+            shared_functions.mark_dirty(self.screen.blit(self.rest_image, (self.x, self.y)))
 
     # Updates the x-coordinate of the center location of the button
     def update_center_x(self):
@@ -1,6 +1,16 @@
 import numpy as np
 import pygame as pg
 import math
+import render_cache
+import shared_functions
+import double_double
+import profiler
+from ViewTransform import ViewTransform
+from GridLayer import GridLayer
+from SpatialHash import SpatialHash
+from PointStore import PointStore
+from ConformalGrid import ConformalGrid
+from PointCloud import PointCloud, disk_stamp, draw_stamps
 
 # Color constants
 BLACK = (0, 0, 0)
@@ -12,6 +22,8 @@ vec_width = 4
 
 point_color = (200, 0, 0)
 point_radius = 5
+cloud_color = (0, 0, 200)
+cloud_radius = 1
 font_size = 20
 font_offset = 30
 
@@ -22,11 +34,27 @@ zero_mark_height = 20
 # Misc.
 # Point and label display parameters
 snap_threshold = 6
+label_cell_size = 64
+
+# At most this many labels starting in the same label cell are considered for display, since no more than a few of them
+# can be displayed without overlapping anyway
+labels_per_cell = 8
+
+# Past this many points on the screen, points are stamped all at once instead of being drawn one circle at a time
+stamp_threshold = 2000
+point_stamp = disk_stamp(point_radius)
+
+# The grid spacing is kept above the half range / 'lines_per_half_range' ** 2 and below the half range. When zooming
+# takes it outside that, it is reset to the half range / 'lines_per_half_range'.
+lines_per_half_range = 5
+
+# Pixel coordinates are clipped to this magnitude so far-off points still convert to ints
+pixel_limit = 2 ** 30
+
+# Coordinates picked from the screen are rounded to this many decimal places past the first significant digit of a pixel
+pick_digits = 3
 
 
-# TODO Known bugs: 1. clicking anywhere selects one number when zoomed in far
-#   TODO 2. zooming in far causes problems in general (shaky screen, etc.)
-#   TODO 3. quitting the application occurs incorrectly when a pygame window is open
 # TODO Nice-to-add features: Allow for unlimited range zooming and arithmetic
 # This class defines a complex number plane which supports selection of points and animated arithmetic
 class ComplexPlane:
@@ -36,52 +64,107 @@ class ComplexPlane:
         self.spacing = spacing
         self.half_range = half_range
         self.phase = phase
-        self.pixel_spacing = 0
-        self.update_pixel_spacing()
         self.offset = offset.real - offset.imag * 1j
-        self.pixel_offset = (0, 0)
-        self.update_pixel_offset()
-        self.added_coords = []
+        self.offset_lo = 0j
+        self.view = None
+        self.update_view()
+        self.points = PointStore()
+        self.plotted_pixels = np.zeros((0, 2), dtype=int)
         self.newly_added_coords = None
         self.renders = {}
         self.rects = {}
-        self.displayed_coords = []
+        self.rect_index = SpatialHash(label_cell_size)
+        self.displayed_rect_index = SpatialHash(label_cell_size)
+        self.displayed_rects = {}
         self.padding = 0
         self.set_padding()
         self.real_mode = real_mode
+        self.grid_layer = GridLayer(self)
+        self.layers = []
+        self.grid_map = None
+        self.point_clouds = []
 
     # Public
 
-    # Draws a complex plane on the screen
+    # Lists every added point, including repeats
+    @property
+    def added_coords(self):
+        return self.points.to_list()
+
+    # Lists the points whose labels are currently displayed
+    @property
+    def displayed_coords(self):
+        return self.points.values()[self.points.displayed[:len(self.points)]].tolist()
+
+    # Draws a complex plane on the screen, on top of any layers such as function plots
     def display(self):
-        self.add_grid()
-        self.add_bold_axes()
-        self.plot_all()
-        self.display_coords()
+        with profiler.stage("layers"):
+            for layer in self.layers:
+                layer.draw(self.screen)
+        with profiler.stage("grid_layer"):
+            self.grid_layer.draw(self.screen)
+        with profiler.stage("point_clouds"):
+            for cloud in self.point_clouds:
+                cloud.draw(self.screen)
+        with profiler.stage("plot_all"):
+            self.plot_all()
+        with profiler.stage("display_coords"):
+            self.display_coords()
 
     # Plots a point on the complex plane
     def plot_point(self, coords):
-        pg.draw.circle(self.screen, point_color, self.convert_to_pixel_coords(coords), point_radius)
+        shared_functions.mark_dirty(pg.draw.circle(self.screen, point_color, self.convert_to_pixel_coords(coords),
+                                                   point_radius))
+
+    # Adds a large set of points to be drawn as a scatter plot, without labels, and returns it. Point clouds are drawn
+    # beneath plotted points.
+    def add_point_cloud(self, coords, color=cloud_color, radius=cloud_radius):
+        cloud = PointCloud(self, coords, color, radius)
+        self.point_clouds.append(cloud)
+        shared_functions.mark_all_dirty()
+        return cloud
+
+    # Removes a point cloud added by 'add_point_cloud'
+    def remove_point_cloud(self, cloud):
+        self.point_clouds.remove(cloud)
+        shared_functions.mark_all_dirty()
 
     # Allows the spacing of the plane to be altered
     def set_spacing(self, spacing):
         self.spacing = spacing
-        self.update_pixel_spacing()
+        self.update_view()
 
-    # Allows the complex plane to be scaled
+    # Allows the complex plane to be scaled. The grid spacing follows along, so that the number of grid lines stays
+    # reasonable however far the plane is zoomed.
     def set_half_range(self, half_range):
         self.half_range = half_range
-        self.update_pixel_spacing()
-        self.update_pixel_offset()
+        if half_range >= lines_per_half_range ** 2 * self.spacing or half_range <= self.spacing:
+            self.spacing = half_range / lines_per_half_range
+        self.update_view()
 
-    # Allows the plane to shift left, right, up, and down
-    def set_offset(self, offset):
+    # Allows the plane to shift left, right, up, and down. 'offset_lo' is the low part of a double-double offset.
+    def set_offset(self, offset, offset_lo=0j):
         self.offset = offset.real if self.real_mode else offset
-        self.update_pixel_offset()
+        self.offset_lo = offset_lo.real if self.real_mode else offset_lo
+        self.update_view()
+
+    # Shifts the plane by 'delta', keeping the offset in double-double precision so that many small pans made while
+    # zoomed in far add up exactly
+    def shift_offset(self, delta):
+        self.offset, self.offset_lo = double_double.add((self.offset, self.offset_lo), delta.real if self.real_mode
+                                                        else delta)
+        self.update_view()
 
     # Allows the plane to be rotated
     def set_phase(self, phase):
         self.phase = phase
+        self.update_view()
+
+    # Draws the grid and axes mapped through a complex function, or straight again if 'func' is None. Only applies
+    # outside of real mode.
+    def set_grid_map(self, func):
+        self.grid_map = None if func is None else ConformalGrid(self, func)
+        shared_functions.mark_all_dirty()
 
     # Draws a line from 'point_1' to 'point_2', where these are interpreted as points on the complex plane
     def draw_line(self, point_1, point_2, color):
@@ -91,199 +174,272 @@ class ComplexPlane:
 
     # Converts from pixel coordinates to coordinates on the complex plane
     def convert_to_plane_coords(self, pixel_coords):
-        pixel_coords = self.rotate(pixel_coords, -self.phase)
-        plane_x = ((pixel_coords[0] - self.pixel_offset[0]) / self.screen.get_width() - 0.5) * 2 * self.half_range
-        plane_y = ((pixel_coords[1] - self.pixel_offset[1]) / self.screen.get_height() - 0.5) * 2 * self.half_range
-        if self.real_mode:
-            plane_y = 0
-        return round(plane_x, 5) - round(plane_y, 5) * 1j
+        return complex(self.convert_to_plane_coords_array(np.array([pixel_coords], dtype=float))[0])
 
     # Converts from complex plane coordinates to pixel coordinates
     def convert_to_pixel_coords(self, plane_coords):
-        pixel_x = (plane_coords.real / (2 * self.half_range) + 0.5) * self.screen.get_width() + self.pixel_offset[0]
-        pixel_y = (-plane_coords.imag / (2 * self.half_range) + 0.5) * self.screen.get_height() + self.pixel_offset[1]
-        pixel = self.rotate((pixel_x, pixel_y), self.phase)
-        return int(round(pixel[0])), int(round(pixel[1]))
+        pixel = self.convert_to_pixel_coords_array(np.array([plane_coords], dtype=np.complex128))[0]
+        return int(pixel[0]), int(pixel[1])
+
+    # Converts an (n, 2) array of pixel coordinates to an array of coordinates on the complex plane
+    def convert_to_plane_coords_array(self, pixel_coords):
+        plane_coords = self.view.to_plane(pixel_coords)
+        if self.real_mode:
+            return self.round_to_view(plane_coords.real) + 0j
+        return self.round_to_view(plane_coords.real) + self.round_to_view(plane_coords.imag) * 1j
+
+    # Converts an array of complex plane coordinates to an (n, 2) array of integer pixel coordinates
+    def convert_to_pixel_coords_array(self, plane_coords):
+        return np.rint(self.pixel_coords_array(plane_coords)).astype(int)
+
+    # Converts an array of complex plane coordinates to an (n, 2) array of unrounded pixel coordinates, clipped so that
+    # coordinates far outside the screen still fit in an int
+    def pixel_coords_array(self, plane_coords):
+        pixels = self.view.to_pixels(plane_coords)
+        return np.clip(np.nan_to_num(pixels, nan=-pixel_limit), -pixel_limit, pixel_limit)
 
     # Displays text boxes with given coordinates on the complex plane, making sure there is no overlap.
     def display_coords(self):
-        new_displayed_coords = []
+        new_displayed_slots = []
+        new_displayed_rects = {}
+        values = self.points.values()
+        displayed = self.points.displayed
         self.update_rects()
-        for coords in self.rects:
-            rect = self.rects[coords]
+        self.index_displayed_rects()
+        for slot, rect in self.rects.items():
+            coords = values[slot]
             if self.intersects_displayed_coords(rect):
                 continue
-            elif coords not in self.displayed_coords and coords != self.newly_added_coords:
+            elif not displayed[slot] and coords != self.newly_added_coords:
                 if self.intersects_rect_coords(rect):
                     continue
             self.screen.blit(self.renders[coords], (rect.left, rect.top))
-            new_displayed_coords.append(coords)
-        self.displayed_coords = new_displayed_coords
+            new_displayed_slots.append(slot)
+            new_displayed_rects[coords] = rect
+        self.mark_changed_labels(new_displayed_rects)
+        displayed[:len(values)] = False
+        displayed[new_displayed_slots] = True
+        self.displayed_rects = new_displayed_rects
         self.newly_added_coords = None
 
     # Adds coords to be displayed
     def add_coords(self, coords):
-        self.added_coords.append(coords)
-        self.renders[coords] = self.get_display_surf(coords)
+        if coords not in self.renders:
+            self.renders[coords] = self.get_display_surf(coords)
+        self.points.add(coords, self.renders[coords].get_size())
         self.newly_added_coords = coords
 
     # removes coords so they are no longer plotted and displayed
     def remove_coords(self, coords):
-        if coords in self.added_coords:
-            self.added_coords.remove(coords)
-            if coords not in self.added_coords:
-                del self.renders[coords]
-        if coords in self.displayed_coords:
-            self.displayed_coords.remove(coords)
+        if coords in self.points and self.points.remove(coords):
+            del self.renders[coords]
 
     # If the pixel coordinates are close enough to a grid point, converts them to the values at the grid point
     def snap_to_grid(self, pixel_coords):
-        pixel_coords = self.rotate(pixel_coords, -self.phase)
-        center_x = self.screen.get_width() / 2 + (self.pixel_offset[0] % self.pixel_spacing)
-        center_y = self.screen.get_height() / 2 + (self.pixel_offset[1] % self.pixel_spacing)
-        closest_horiz_coord = center_x + round((pixel_coords[0] - center_x) / self.pixel_spacing) * self.pixel_spacing
-        closest_vert_coord = center_y + round((pixel_coords[1] - center_y) / self.pixel_spacing) * self.pixel_spacing
+        view = self.view
+        pixel_coords = view.unrotate(pixel_coords)
+        center_x = view.center[0] + view.grid_phase[0]
+        center_y = view.center[1] + view.grid_phase[1]
+        closest_horiz_coord = center_x + round((pixel_coords[0] - center_x) / view.pixel_spacing) * view.pixel_spacing
+        closest_vert_coord = center_y + round((pixel_coords[1] - center_y) / view.pixel_spacing) * view.pixel_spacing
         if abs(closest_horiz_coord - pixel_coords[0]) <= snap_threshold \
                 and abs(closest_vert_coord - pixel_coords[1]) <= snap_threshold:
-            return self.convert_to_plane_coords(self.rotate((closest_horiz_coord, closest_vert_coord), self.phase))
-        return self.convert_to_plane_coords(self.rotate(pixel_coords, self.phase))
+            return self.convert_to_plane_coords(view.rotate((closest_horiz_coord, closest_vert_coord)))
+        return self.convert_to_plane_coords(view.rotate(pixel_coords))
 
     # Private
 
     # Plots all current points on the complex plane
     def plot_all(self):
-        for pt in self.added_coords:
-            if self.in_screen(self.convert_to_pixel_coords(pt)):
-                self.plot_point(pt)
+        pixels = self.convert_to_pixel_coords_array(self.points.values())
+        plotted = pixels[self.view.in_screen_array(pixels)]
+        if len(plotted) > stamp_threshold:
+            draw_stamps(self.screen, plotted[:, 0], plotted[:, 1], point_color, point_stamp)
+            shared_functions.mark_all_dirty()
+        else:
+            for pixel in plotted.tolist():
+                pg.draw.circle(self.screen, point_color, pixel, point_radius)
+        if not shared_functions.full_update:
+            for pixel in set(map(tuple, plotted.tolist())) ^ set(map(tuple, self.plotted_pixels.tolist())):
+                shared_functions.mark_dirty((pixel[0] - point_radius, pixel[1] - point_radius, 2 * point_radius + 1,
+                                             2 * point_radius + 1))
+        self.plotted_pixels = plotted
+
+    # Marks the areas of the labels which were just blitted, and of the labels which have disappeared or moved since they
+    # were last displayed, as changed
+    def mark_changed_labels(self, new_displayed_rects):
+        if shared_functions.full_update:
+            return
+        for rect in new_displayed_rects.values():
+            shared_functions.mark_dirty(rect)
+        for coords, rect in self.displayed_rects.items():
+            if new_displayed_rects.get(coords) != rect:
+                shared_functions.mark_dirty(rect)
 
     # Checks if a given coordinate rect would intersect any displayed coords
     def intersects_displayed_coords(self, rect):
-        for coords in self.displayed_coords:
-            if coords in self.rects and self.rects[coords].colliderect(rect) and self.rects[coords] != rect:
+        for coords in self.displayed_rect_index.query(rect):
+            if self.rects[coords].colliderect(rect) and self.rects[coords] != rect:
                 return True
         return False
 
     # Checks if a given coordinate rect would intersect any other added coords
     def intersects_rect_coords(self, rect):
-        for coords in self.rects:
+        for coords in self.rect_index.query(rect):
             if self.rects[coords].colliderect(rect) and self.rects[coords] != rect:
                 return True
         return False
 
     # Returns a surface for a numerical coordinate display.
     def get_display_surf(self, coords):
-        font = pg.font.Font(None, font_size)
         imag_part = "" if self.real_mode else " + " + str(coords.imag) + "i"
-        render = font.render(str(coords.real) + imag_part, True, BLACK)
-        return render
-
-    # Returns a rect for a numerical coordinate display
-    def get_display_rect(self, coords):
-        pos = (self.convert_to_pixel_coords(coords)[0], self.convert_to_pixel_coords(coords)[1] - font_offset)
-        render = self.renders[coords]
-        return render.get_rect(center=(pos[0] + render.get_width() / 2, pos[1] + render.get_height() / 2))
+        return render_cache.get_label(str(coords.real) + imag_part, font_size, BLACK, self.real_mode)
 
-    # Generates all currrent coordinate display rects which will not cause an overflow
+    # Generates the display rects of all current coordinates which are at least partly on the screen, by slot, and
+    # indexes them by location. Only the first 'labels_per_cell' labels starting in each label cell are kept, putting the
+    # ones displayed in the previous frame and the newly added one first.
     def update_rects(self):
         self.rects.clear()
-        for coords in self.added_coords:
-            try:
-                rect = self.get_display_rect(coords)
-                if self.rect_in_screen(rect):
-                    self.rects[coords] = rect
-            except TypeError:
-                continue
-
-    # Updates the value of 'pixel_spacing' to conform to changes in 'half_range' or 'spacing'
-    def update_pixel_spacing(self):
-        self.pixel_spacing = self.screen.get_width() / (2 * self.half_range) * self.spacing
-
-    # Updates the value of 'pixel_offset' to conform to changes in 'half_range' or 'offset'
-    def update_pixel_offset(self):
-        x_offset = self.screen.get_width() / (2 * self.half_range) * self.offset.real
-        y_offset = self.screen.get_height() / (2 * self.half_range) * self.offset.imag
-        self.pixel_offset = x_offset, y_offset
-
-    # Adds the main grid to the screen, or the main line with tick marks in real mode
-    def add_grid(self):
-        self.add_imag_lines()
+        self.rect_index.clear()
+        pixels = self.convert_to_pixel_coords_array(self.points.values())
+        sizes = self.points.label_sizes[:len(self.points)]
+        lefts = centered_starts(pixels[:, 0], sizes[:, 0])
+        tops = centered_starts(pixels[:, 1] - font_offset, sizes[:, 1])
+        rights = lefts + sizes[:, 0]
+        bottoms = tops + sizes[:, 1]
+        in_width = ((lefts >= 0) & (lefts <= self.view.width)) | ((rights >= 0) & (rights <= self.view.width))
+        in_height = ((tops >= 0) & (tops <= self.view.height)) | ((bottoms >= 0) & (bottoms <= self.view.height))
+        slots = self.cull_crowded_labels(np.flatnonzero(in_width & in_height), lefts, tops)
+        for slot, left, top, size in zip(slots.tolist(), lefts[slots].tolist(), tops[slots].tolist(),
+                                         sizes[slots].tolist()):
+            rect = pg.Rect(left, top, size[0], size[1])
+            self.rects[slot] = rect
+            self.rect_index.insert(slot, rect)
+
+    # Returns the slots, in order, which remain after keeping at most 'labels_per_cell' of the labels starting at 'lefts'
+    # and 'tops' in each label cell
+    def cull_crowded_labels(self, slots, lefts, tops):
+        if len(slots) <= labels_per_cell:
+            return slots
+        cell_xs = lefts[slots] // label_cell_size
+        cell_ys = tops[slots] // label_cell_size
+        not_displayed = ~self.points.displayed[slots]
+        not_new = slots != self.points.slots.get(self.newly_added_coords, -1)
+        order = np.lexsort((slots, not_new, not_displayed, cell_ys, cell_xs))
+        cell_xs, cell_ys = cell_xs[order], cell_ys[order]
+        starts = np.flatnonzero(np.r_[True, (cell_xs[1:] != cell_xs[:-1]) | (cell_ys[1:] != cell_ys[:-1])])
+        ranks = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        return np.sort(slots[order[ranks < labels_per_cell]])
+
+    # Indexes the rects of the coords displayed in the previous frame by location
+    def index_displayed_rects(self):
+        self.displayed_rect_index.clear()
+        for slot in self.rects:
+            if self.points.displayed[slot]:
+                self.displayed_rect_index.insert(slot, self.rects[slot])
+
+    # Rebuilds the view transform to conform to changes in 'spacing', 'half_range', 'phase' or 'offset'
+    def update_view(self):
+        self.view = ViewTransform(self.screen.get_width(), self.screen.get_height(), self.spacing, self.half_range,
+                                  self.phase, self.offset, self.offset_lo)
+        shared_functions.mark_all_dirty()
+
+    # Rounds an array of floats picked from the screen to 'pick_digits' decimal places past the size of a pixel. Values
+    # which a float can't hold to that many decimal places are left as they are.
+    def round_to_view(self, values):
+        decimals = pick_digits - math.floor(math.log10(self.view.pixel_size))
+        with np.errstate(over="ignore", invalid="ignore"):
+            rounded = np.round(values, decimals)
+            return np.where(np.abs(values) * 10.0 ** decimals < 2 ** 52, rounded, values)
+
+    # Adds the main grid to a surface, or the main line with tick marks in real mode
+    def add_grid(self, surface):
+        if self.grid_map is not None and not self.real_mode:
+            self.grid_map.draw_grid(surface, BLACK, line_width)
+            return
+        self.add_imag_lines(surface)
         if not self.real_mode:
-            self.add_real_lines()
+            self.add_real_lines(surface)
 
-    # Adds imaginary lines to the screen
-    def add_imag_lines(self):
+    # Adds imaginary lines to a surface
+    def add_imag_lines(self, surface):
         for pair in self.imag_line_coords():
-            pg.draw.line(self.screen, BLACK, pair[0], pair[1], line_width)
+            pg.draw.line(surface, BLACK, pair[0], pair[1], line_width)
 
-    # Adds real lines to the screen
-    def add_real_lines(self):
+    # Adds real lines to a surface
+    def add_real_lines(self, surface):
         for pair in self.real_line_coords():
-            pg.draw.line(self.screen, BLACK, pair[0], pair[1], line_width)
+            pg.draw.line(surface, BLACK, pair[0], pair[1], line_width)
 
-    # Adds bold real and imaginary axes to the screen
-    def add_bold_axes(self):
-        self.add_real_axis()
-        self.add_imag_axis()
+    # Adds bold real and imaginary axes to a surface
+    def add_bold_axes(self, surface):
+        if self.grid_map is not None and not self.real_mode:
+            self.grid_map.draw_axes(surface, BLACK, axis_width)
+            return
+        self.add_real_axis(surface)
+        self.add_imag_axis(surface)
 
-    # Adds a bold imaginary axis to the screen
-    def add_imag_axis(self):
-        imag_width = self.screen.get_width() / 2 + self.pixel_offset[0]
-        top = (imag_width, self.zero_ys()[0] if self.real_mode else -self.padding)
-        bottom = (imag_width, self.zero_ys()[1] if self.real_mode else self.screen.get_height() + self.padding)
+    # Adds a bold imaginary axis to a surface
+    def add_imag_axis(self, surface):
+        top, bottom = self.imag_axis_coords()
         try:
-            pg.draw.line(self.screen, BLACK, self.rotate(top, self.phase), self.rotate(bottom, self.phase), axis_width)
+            pg.draw.line(surface, BLACK, top, bottom, axis_width)
         except TypeError:
             return
 
-    # Adds a bold real axis to the screen
-    def add_real_axis(self):
-        real_height = self.screen.get_height() / 2 + self.pixel_offset[1]
-        left = (-self.padding, real_height)
-        right = (self.screen.get_width() + self.padding, real_height)
+    # Adds a bold real axis to a surface
+    def add_real_axis(self, surface):
+        left, right = self.real_axis_coords()
         try:
-            pg.draw.line(self.screen, BLACK, self.rotate(left, self.phase), self.rotate(right, self.phase), axis_width)
+            pg.draw.line(surface, BLACK, left, right, axis_width)
         except TypeError:
             return
 
+    # Gets the ends of the imaginary axis, or of the zero mark in real mode
+    def imag_axis_coords(self):
+        imag_width = self.view.center[0] + self.view.pixel_offset[0]
+        top = (imag_width, self.zero_ys()[0] if self.real_mode else -self.padding)
+        bottom = (imag_width, self.zero_ys()[1] if self.real_mode else self.view.height + self.padding)
+        return self.view.rotate(top), self.view.rotate(bottom)
+
+    # Gets the ends of the real axis
+    def real_axis_coords(self):
+        real_height = self.view.center[1] + self.view.pixel_offset[1]
+        left = (-self.padding, real_height)
+        right = (self.view.width + self.padding, real_height)
+        return self.view.rotate(left), self.view.rotate(right)
+
     # Gets coords for imaginary lines which will be added to the screen
     def imag_line_coords(self):
         x_coords = self.x_coords()
-        tops_y = [self.tick_ys()[0] if self.real_mode else -self.padding] * len(x_coords)
-        tops = list(zip(x_coords, tops_y))
-        bottoms_y = [self.tick_ys()[1] if self.real_mode else self.screen.get_height() + self.padding] * len(x_coords)
-        bottoms = list(zip(x_coords, bottoms_y))
-        return [(self.rotate(pair[0], self.phase), self.rotate(pair[1], self.phase)) for pair in zip(tops, bottoms)]
+        top_y, bottom_y = self.tick_ys() if self.real_mode else (-self.padding, self.view.height + self.padding)
+        tops = np.column_stack((x_coords, np.full(len(x_coords), top_y)))
+        bottoms = np.column_stack((x_coords, np.full(len(x_coords), bottom_y)))
+        return list(zip(self.view.rotate_array(tops).tolist(), self.view.rotate_array(bottoms).tolist()))
 
     # Gets coords for real lines which will be added to the screen
     def real_line_coords(self):
         y_coords = self.y_coords()
-        lefts_x = [-self.padding] * len(y_coords)
-        lefts = list(zip(lefts_x, y_coords))
-        rights_x = [self.screen.get_width() + self.padding] * len(y_coords)
-        rights = list(zip(rights_x, y_coords))
-        return [(self.rotate(pair[0], self.phase), self.rotate(pair[1], self.phase)) for pair in zip(lefts, rights)]
+        lefts = np.column_stack((np.full(len(y_coords), -self.padding), y_coords))
+        rights = np.column_stack((np.full(len(y_coords), self.view.width + self.padding), y_coords))
+        return list(zip(self.view.rotate_array(lefts).tolist(), self.view.rotate_array(rights).tolist()))
 
     # Creates the x coords for vertical lines
     def x_coords(self):
-        offset_center = self.screen.get_width() / 2 + (self.pixel_offset[0] % self.pixel_spacing)
-        neg = np.arange(offset_center, -self.padding, -self.pixel_spacing)
-        pos = np.arange(offset_center + self.pixel_spacing, self.screen.get_width() + self.padding, self.pixel_spacing)
+        view = self.view
+        offset_center = view.center[0] + view.grid_phase[0]
+        neg = np.arange(offset_center, -self.padding, -view.pixel_spacing)
+        pos = np.arange(offset_center + view.pixel_spacing, view.width + self.padding, view.pixel_spacing)
         return np.append(neg, pos)
 
     # Creates the y coords for horizontal lines
     def y_coords(self):
-        offset_center = self.screen.get_height() / 2 + (self.pixel_offset[1] % self.pixel_spacing)
-        pos = np.arange(offset_center, -self.padding, -self.pixel_spacing)
-        neg = np.arange(offset_center + self.pixel_spacing, self.screen.get_height() + self.padding, self.pixel_spacing)
+        view = self.view
+        offset_center = view.center[1] + view.grid_phase[1]
+        pos = np.arange(offset_center, -self.padding, -view.pixel_spacing)
+        neg = np.arange(offset_center + view.pixel_spacing, view.height + self.padding, view.pixel_spacing)
         return np.append(pos, neg)
 
-    # Performs a rotation of a point about the center of the screen
-    def rotate(self, pt, angle):
-        pt_minus_center = pt[0] - self.screen.get_width() / 2, pt[1] - self.screen.get_height() / 2
-        rot_matrix = np.array([[np.cos(angle), np.sin(angle)], [-np.sin(angle), np.cos(angle)]])
-        result = np.matmul(rot_matrix, np.array(pt_minus_center))
-        return result[0] + self.screen.get_width() / 2, result[1] + self.screen.get_height() / 2
-
     # Sets the amount of padding to apply in case of rotation
     def set_padding(self):
         if self.screen.get_height() < self.screen.get_width():
@@ -292,19 +448,22 @@ class ComplexPlane:
             to_subtract = self.screen.get_width()
         self.padding = (np.sqrt(self.screen.get_width() ** 2 + self.screen.get_height() ** 2) - to_subtract) / 2
 
-    # Determines whether a rect for given coords is in the screen
-    def rect_in_screen(self, rect):
-        return self.in_screen(rect.topleft) or self.in_screen(rect.topright) or self.in_screen(rect.bottomleft) or \
-            self.in_screen(rect.bottomright)
-
     # Determines whether a given coordinate is within the display or not
     def in_screen(self, pt):
-        return 0 <= pt[0] <= self.screen.get_width() and 0 <= pt[1] <= self.screen.get_height()
+        return self.view.in_screen(pt)
 
     # Returns the upper and lower y-coordinates of the tick marks in real mode
     def tick_ys(self):
-        return self.screen.get_height() / 2 - tick_mark_height, self.screen.get_height() / 2 + tick_mark_height
-    
+        return self.view.center[1] - tick_mark_height, self.view.center[1] + tick_mark_height
+
     # Returns the upper and lower y-coordinates of the zero mark in real mode
     def zero_ys(self):
-        return self.screen.get_height() / 2 - zero_mark_height, self.screen.get_height() / 2 + zero_mark_height
+        return self.view.center[1] - zero_mark_height, self.view.center[1] + zero_mark_height
+
+
+# Returns where labels of the given lengths start along one axis when placed at 'positions'. Labels have always been
+# placed by centering them on their unrounded middle, which pygame rounds half away from zero, so odd-sized labels
+# start a pixel further along; this keeps them exactly where they were.
+def centered_starts(positions, lengths):
+    middles = positions + lengths / 2
+    return (np.sign(middles) * np.floor(np.abs(middles) + 0.5) - lengths // 2).astype(int)
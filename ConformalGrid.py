@@ -0,0 +1,99 @@
+import numpy as np
+import pygame as pg
+
+# Color constants
+BLACK = (0, 0, 0)
+
+# Samples taken along every line before any are added, and the most rounds of adding samples
+initial_samples = 32
+max_refinements = 8
+
+# A segment between samples is split in two while its mapped midpoint is more than this many pixels off the segment
+tolerance = 0.5
+
+# A segment which is still off by more than 'tolerance' after every refinement, and longer than this many screen sizes,
+# is taken to jump across a discontinuity and isn't drawn
+max_jump = 2
+
+# Mapped coordinates are clipped to this magnitude so far-off samples can still be drawn
+pixel_limit = 2 ** 30
+
+
+# Draws the grid lines and axes of a complex plane after mapping them through a complex function 'func', such as
+# z ** 2, 1 / z, exp or a Mobius transformation. Each line is sampled as a whole array, and samples are only added
+# where the mapped line bends, so straight parts stay cheap. 'func' must be built from NumPy operations. The mapped
+# lines are kept until the plane's view changes.
+class ConformalGrid:
+
+    def __init__(self, plane, func):
+        self.plane = plane
+        self.func = func
+        self.view = None
+        self.grid_lines = []
+        self.axis_lines = []
+
+    # Draws the mapped grid lines to a surface
+    def draw_grid(self, surface, color, width):
+        self.update()
+        for line in self.grid_lines:
+            pg.draw.lines(surface, color, False, line, width)
+
+    # Draws the mapped axes to a surface
+    def draw_axes(self, surface, color, width):
+        self.update()
+        for line in self.axis_lines:
+            pg.draw.lines(surface, color, False, line, width)
+
+    # Maps the plane's grid lines and axes again if its view has changed
+    def update(self):
+        plane = self.plane
+        if plane.view is self.view:
+            return
+        self.view = plane.view
+        self.grid_lines = map_lines(self.view, self.func, plane.imag_line_coords() + plane.real_line_coords())
+        self.axis_lines = map_lines(self.view, self.func, [plane.real_axis_coords(), plane.imag_axis_coords()])
+
+
+# Maps straight lines, given as pairs of pixel coordinates in 'view', through 'func'. Returns the mapped lines as lists
+# of pixel coordinates, split wherever the mapped line isn't finite or jumps across a discontinuity.
+def map_lines(view, func, pixel_pairs):
+    if not pixel_pairs:
+        return []
+    ends = view.to_plane(np.array(pixel_pairs, dtype=float).reshape(-1, 2)).reshape(-1, 2)
+    starts, steps = ends[:, 0], ends[:, 1] - ends[:, 0]
+
+    def map_samples(lines, ts):
+        with np.errstate(all="ignore"):
+            values = np.asarray(func(starts[lines] + ts * steps[lines]), dtype=np.complex128) * np.ones(len(ts))
+            return view.to_pixels(values)
+
+    lines = np.repeat(np.arange(len(ends)), initial_samples)
+    ts = np.tile(np.linspace(0, 1, initial_samples), len(ends))
+    pixels = map_samples(lines, ts)
+    # 'active' marks the samples starting segments which were just split, and so still need checking
+    active = np.ones(len(ts), dtype=bool)
+    for _ in range(max_refinements):
+        check = np.flatnonzero(active[:-1] & (lines[1:] == lines[:-1]))
+        if len(check) == 0:
+            break
+        mid_ts = (ts[check] + ts[check + 1]) / 2
+        mid_pixels = map_samples(lines[check], mid_ts)
+        with np.errstate(invalid="ignore"):
+            errors = np.hypot(*(mid_pixels - (pixels[check] + pixels[check + 1]) / 2).T)
+        split = ~(errors <= tolerance)
+        active[:] = False
+        active[check[split]] = True
+        lines = np.append(lines, lines[check[split]])
+        ts = np.append(ts, mid_ts[split])
+        pixels = np.concatenate((pixels, mid_pixels[split]))
+        active = np.append(active, np.ones(split.sum(), dtype=bool))
+        order = np.lexsort((ts, lines))
+        lines, ts, pixels, active = lines[order], ts[order], pixels[order], active[order]
+    finite = np.all(np.isfinite(pixels), axis=1)
+    lengths = np.hypot(*(pixels[1:] - pixels[:-1]).T)
+    with np.errstate(invalid="ignore"):
+        jumps = active[:-1] & ~(lengths <= max_jump * max(view.width, view.height))
+    breaks = (lines[1:] != lines[:-1]) | ~finite[:-1] | ~finite[1:] | jumps
+    pixels = np.clip(pixels, -pixel_limit, pixel_limit)
+    pieces = np.split(np.arange(len(ts)), np.flatnonzero(breaks) + 1)
+    return [pixels[piece].tolist() for piece in pieces if len(piece) > 1 and finite[piece].all()]
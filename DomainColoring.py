@@ -0,0 +1,63 @@
+import numpy as np
+import pygame as pg
+
+# Color of pixels where the function isn't finite
+undefined_color = (255, 255, 255)
+
+# Brightness of the darkest and lightest parts of each ring between successive powers of two of |f(z)|
+min_value = 0.6
+max_value = 1
+
+
+# A layer which colors every pixel of a complex plane by the value of a complex function 'func' there: the hue shows
+# arg(f(z)) and the brightness repeats over every doubling of |f(z)|. 'func' is called once per view with an array
+# holding z for each pixel, so it must be built from NumPy operations. Every 'resolution' by 'resolution' block of pixels
+# shares a color, so rendering can be made faster while zoomed or panned.
+class DomainColoring:
+
+    def __init__(self, plane, func, resolution=1):
+        self.plane = plane
+        self.func = func
+        self.resolution = resolution
+        self.samples = None
+        self.surface = None
+        self.view = None
+
+    # Blits the layer to a surface, bringing it up to date with the plane's view first
+    def draw(self, surface):
+        if self.plane.view is not self.view:
+            self.render()
+            self.view = self.plane.view
+        surface.blit(self.surface, (0, 0))
+
+    # Evaluates the function at every pixel of the plane's view and colors the layer with the results
+    def render(self):
+        width, height = self.plane.screen.get_size()
+        columns, rows = -(-width // self.resolution), -(-height // self.resolution)
+        if self.samples is None or self.samples.get_size() != (columns, rows):
+            self.samples = pg.Surface((columns, rows))
+        z = self.plane.view.to_plane_grid(np.arange(columns) * self.resolution,
+                                          np.arange(rows) * self.resolution).ravel()
+        with np.errstate(all="ignore"):
+            values = np.asarray(self.func(z), dtype=np.complex128) * np.ones_like(z)
+            colors = color_values(values)
+        pg.surfarray.blit_array(self.samples, colors.reshape(columns, rows, 3))
+        self.surface = pg.transform.scale(self.samples, (width, height)) if self.resolution > 1 else self.samples
+
+
+# Maps an array of complex values to an (n, 3) array of RGB colors. The hue of each color channel is worked out with the
+# piecewise-linear form of the HSV conversion, at full saturation, in float32 and without modulo operations to keep it
+# quick.
+def color_values(values):
+    hue = np.arctan2(values.imag, values.real).astype(np.float32) * np.float32(3 / np.pi)
+    hue += 6 * (hue < 0)
+    log_magnitude = np.log2(np.abs(values).astype(np.float32))
+    value = (min_value + (max_value - min_value) * (log_magnitude - np.floor(log_magnitude))) * 255
+    value[log_magnitude == -np.inf] = 0
+    colors = np.empty((len(values), 3), dtype=np.uint8)
+    for channel, start in enumerate((5, 3, 1)):
+        sector = hue + start
+        sector -= 6 * (sector >= 6)
+        colors[:, channel] = value * (1 - np.clip(np.minimum(sector, 4 - sector), 0, 1))
+    colors[~np.isfinite(values)] = undefined_color
+    return colors
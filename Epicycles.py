@@ -0,0 +1,99 @@
+import numpy as np
+import pygame as pg
+
+# Color constants
+WHITE = (255, 255, 255)
+
+# Display parameters
+arm_color = (120, 120, 120)
+circle_color = (200, 200, 200)
+trail_color = (255, 0, 255)
+tip_color = (255, 0, 255)
+trail_width = 2
+tip_radius = 4
+fit_fraction = 0.8
+
+# Only the circles of this many of the largest phasors are drawn, and none smaller than this many pixels across
+max_circles = 200
+min_circle_radius = 2
+
+# Number of tip positions the traced path remembers
+default_trail_length = 2048
+
+
+# Animates a chain of rotating phasors drawn tip to tail, the sum of coefficient * e^(i * frequency * phase) over all of
+# its terms, like a row of Euler circles. All tips of a frame are worked out at once as a cumulative sum, and the path
+# traced by the last tip is kept in a fixed-size ring buffer and drawn as one polyline. 'scale' is in pixels per unit.
+class Epicycles:
+
+    def __init__(self, screen, coefficients, frequencies, scale, phase=0, trail_length=default_trail_length):
+        order = np.argsort(-np.abs(coefficients), kind="stable")
+        self.screen = screen
+        self.coefficients = np.asarray(coefficients, dtype=np.complex128)[order]
+        self.frequencies = np.asarray(frequencies, dtype=float)[order]
+        self.scale = scale
+        self.center = np.array([screen.get_width() / 2, screen.get_height() / 2])
+        self.circle_radii = np.abs(self.coefficients) * scale
+        self.trail = np.zeros((trail_length, 2))
+        self.trail_start = 0
+        self.trail_size = 0
+        self.phase = phase
+        self.tips = None
+        self.set_phase(phase)
+
+    # Builds epicycles which retrace a closed path, given as complex points in order around it, fitted to the screen.
+    # The coefficients are the path's discrete Fourier transform; only the 'terms' largest are kept if it is given.
+    @classmethod
+    def from_path(cls, screen, points, terms=None, trail_length=default_trail_length):
+        points = np.asarray(points, dtype=np.complex128)
+        points = points - points.mean()
+        coefficients = np.fft.fft(points) / len(points)
+        frequencies = np.fft.fftfreq(len(points), 1 / len(points))
+        if terms is not None and terms < len(points):
+            largest = np.argsort(-np.abs(coefficients), kind="stable")[:terms]
+            coefficients, frequencies = coefficients[largest], frequencies[largest]
+        scale = fit_fraction * min(screen.get_size()) / 2 / max(np.abs(points).max(), 1e-12)
+        return cls(screen, coefficients, frequencies, scale, trail_length=trail_length)
+
+    # Public
+
+    def display(self):
+        pixels = self.tips.tolist()
+        shown = np.flatnonzero(self.circle_radii[:max_circles] >= min_circle_radius)
+        for i in shown.tolist():
+            pg.draw.circle(self.screen, circle_color, pixels[i], self.circle_radii[i], 1)
+        pg.draw.lines(self.screen, arm_color, False, pixels)
+        if self.trail_size > 1:
+            pg.draw.lines(self.screen, trail_color, False, self.trail_pixels().tolist(), trail_width)
+        pg.draw.circle(self.screen, tip_color, pixels[-1], tip_radius)
+
+    # Moves every phasor to 'phase' and adds the position of the last tip to the traced path
+    def set_phase(self, phase):
+        self.phase = phase
+        arms = self.coefficients * np.exp(1j * self.frequencies * phase)
+        ends = np.cumsum(arms)
+        self.tips = self.center + self.scale * np.column_stack((np.append(0, ends.real), -np.append(0, ends.imag)))
+        self.add_to_trail(self.tips[-1])
+
+    # Forgets the traced path
+    def clear_trail(self):
+        self.trail_start = 0
+        self.trail_size = 0
+
+    # Private
+
+    # Adds a position to the ring buffer, overwriting the oldest one once it is full
+    def add_to_trail(self, pixel):
+        length = len(self.trail)
+        self.trail[(self.trail_start + self.trail_size) % length] = pixel
+        if self.trail_size < length:
+            self.trail_size += 1
+        else:
+            self.trail_start = (self.trail_start + 1) % length
+
+    # Returns the traced path, oldest position first
+    def trail_pixels(self):
+        end = self.trail_start + self.trail_size
+        if end <= len(self.trail):
+            return self.trail[self.trail_start:end]
+        return np.concatenate((self.trail[self.trail_start:], self.trail[:end - len(self.trail)]))
@@ -1,8 +1,11 @@
+import collections
 import pygame as pg
 import math
+import render_cache
 
 # Color constants
 BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
 
 # Display parameters
 radius = 250
@@ -19,6 +22,9 @@ font_offset = 30
 round_num = 1
 bigger_round_num = 2
 
+# The cos and sin of a phase, with the label texts of the oscillators' values and of the formula
+PhaseValues = collections.namedtuple("PhaseValues", ["cos", "sin", "x_text", "y_text", "formula_text"])
+
 
 class EulerCircle:
 
@@ -26,6 +32,8 @@ class EulerCircle:
         self.screen = screen
         self.phase = phase
         self.center = round(self.screen.get_width() / 2), round(self.screen.get_height() / 2)
+        self.background = self.make_background()
+        self.values = phase_values(phase)
         self.x_oscillator_center = 0
         self.y_oscillator_center = 0
         self.revolving_point_center = 0
@@ -33,64 +41,87 @@ class EulerCircle:
 
     # Public
 
+    # Draws the circle over the whole screen and returns the rects of everything drawn on top of the static background
     def display(self):
-        self.draw_big_circle()
-        self.draw_axes()
-        self.plot_revolving_point()
-        self.plot_x_oscillator()
-        self.draw_x_oscillator_line()
-        self.plot_y_oscillator()
-        self.draw_y_oscillator_line()
-        self.display_point_vals()
-        self.display_formula()
+        self.screen.blit(self.background, (0, 0))
+        return [self.plot_revolving_point(), self.plot_x_oscillator(), self.draw_x_oscillator_line(),
+                self.plot_y_oscillator(), self.draw_y_oscillator_line(), *self.display_point_vals(),
+                self.display_formula()]
 
     def set_phase(self, phase):
         self.phase = phase
+        self.values = phase_values(phase)
         self.update_point_centers()
 
-    # Private
+    # Sets the phase to step number 'step' of a phase table, reusing its precomputed values
+    def set_step(self, phase_table, step):
+        self.phase = phase_table.phases[step]
+        self.values = phase_table.values[step]
+        self.update_point_centers()
 
-    def draw_big_circle(self):
-        pg.draw.circle(self.screen, BLACK, self.center, radius, circle_thickness)
+    # Private
 
-    def draw_axes(self):
+    # Draws the parts of the display which never change, the big circle and the axes, once onto a background surface
+    def make_background(self):
+        background = self.screen.copy()
+        background.fill(WHITE)
+        pg.draw.circle(background, BLACK, self.center, radius, circle_thickness)
         left = self.center[0] - radius, self.center[1]
         right = self.center[0] + radius, self.center[1]
-        pg.draw.line(self.screen, axis_color, left, right)
+        pg.draw.line(background, axis_color, left, right)
         top = self.center[0], self.center[1] - radius
         bottom = self.center[0], self.center[1] + radius
-        pg.draw.line(self.screen, axis_color, top, bottom)
+        pg.draw.line(background, axis_color, top, bottom)
+        return background
 
     def plot_revolving_point(self):
-        pg.draw.circle(self.screen, revolving_point_color, self.revolving_point_center, point_radius)
+        return pg.draw.circle(self.screen, revolving_point_color, self.revolving_point_center, point_radius)
 
     def plot_x_oscillator(self):
-        pg.draw.circle(self.screen, x_oscillator_color, self.x_oscillator_center, point_radius)
+        return pg.draw.circle(self.screen, x_oscillator_color, self.x_oscillator_center, point_radius)
 
     def draw_x_oscillator_line(self):
-        pg.draw.line(self.screen, y_oscillator_color, self.x_oscillator_center, self.revolving_point_center)
+        return pg.draw.line(self.screen, y_oscillator_color, self.x_oscillator_center, self.revolving_point_center)
 
     def plot_y_oscillator(self):
-        pg.draw.circle(self.screen, y_oscillator_color, self.y_oscillator_center, point_radius)
+        return pg.draw.circle(self.screen, y_oscillator_color, self.y_oscillator_center, point_radius)
 
     def draw_y_oscillator_line(self):
-        pg.draw.line(self.screen, x_oscillator_color, self.y_oscillator_center, self.revolving_point_center)
+        return pg.draw.line(self.screen, x_oscillator_color, self.y_oscillator_center, self.revolving_point_center)
 
     def display_formula(self):
-        render = pg.font.Font(None, big_font_size).render("e^(i" + str(round(self.phase, round_num)) + ")", True, BLACK)
-        self.screen.blit(render, display_left_top_x)
+        render = render_cache.get_label(self.values.formula_text, big_font_size, BLACK)
+        return self.screen.blit(render, display_left_top_x)
 
     def display_point_vals(self):
-        x_coord = str(round(math.cos(self.phase), bigger_round_num))
-        y_coord = str(round(math.sin(self.phase), bigger_round_num))
-        h_pt_render = pg.font.Font(None, small_font_size).render(x_coord, True, BLACK)
-        self.screen.blit(h_pt_render, (self.x_oscillator_center[0], self.x_oscillator_center[1] + font_offset))
-        v_pt_render = pg.font.Font(None, small_font_size).render(y_coord + "i", True, BLACK)
-        self.screen.blit(v_pt_render, (self.y_oscillator_center[0], self.y_oscillator_center[1] + font_offset))
-        r_pt_render = pg.font.Font(None, small_font_size).render(x_coord + " + " + y_coord + "i", True, BLACK)
-        self.screen.blit(r_pt_render, (self.revolving_point_center[0], self.revolving_point_center[1] - font_offset))
+        x_text, y_text = self.values.x_text, self.values.y_text
+        point_text = x_text + " + " + y_text
+        h_pt_render = render_cache.get_label(x_text, small_font_size, BLACK)
+        v_pt_render = render_cache.get_label(y_text, small_font_size, BLACK)
+        r_pt_render = render_cache.get_label(point_text, small_font_size, BLACK)
+        return [self.screen.blit(h_pt_render, (self.x_oscillator_center[0], self.x_oscillator_center[1] + font_offset)),
+                self.screen.blit(v_pt_render, (self.y_oscillator_center[0], self.y_oscillator_center[1] + font_offset)),
+                self.screen.blit(r_pt_render, (self.revolving_point_center[0],
+                                               self.revolving_point_center[1] - font_offset))]
 
     def update_point_centers(self):
-        self.x_oscillator_center = round(self.center[0] + radius * math.cos(self.phase)), self.center[1]
-        self.y_oscillator_center = self.center[0], round(self.center[1] - radius * math.sin(self.phase))
+        self.x_oscillator_center = round(self.center[0] + radius * self.values.cos), self.center[1]
+        self.y_oscillator_center = self.center[0], round(self.center[1] - radius * self.values.sin)
         self.revolving_point_center = self.x_oscillator_center[0], self.y_oscillator_center[1]
+
+
+# The phases a full turn of the Euler circle steps through, 'phase_step' apart or as close to it as divides a full turn
+# evenly, along with their cos, sin and label texts. The animation repeats every turn, so these are only worked out once.
+class PhaseTable:
+
+    def __init__(self, phase_step):
+        self.count = max(round(math.tau / phase_step), 1)
+        self.phases = [math.tau * step / self.count for step in range(self.count)]
+        self.values = [phase_values(phase) for phase in self.phases]
+
+
+# Works out the values shown for a phase
+def phase_values(phase):
+    cos, sin = math.cos(phase), math.sin(phase)
+    return PhaseValues(cos, sin, str(round(cos, bigger_round_num)), str(round(sin, bigger_round_num)) + "i",
+                       "e^(i" + str(round(phase, round_num)) + ")")
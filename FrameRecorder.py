@@ -0,0 +1,272 @@
+import io
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+import pygame as pg
+import shared_functions
+from PIL import Image
+
+# Number of captured frames which may wait for the encoder; further frames are dropped, or wait if 'block' is set
+queue_size = 8
+
+# Recording formats by file extension. Any other path is a directory which receives a numbered PNG per frame.
+formats = {".gif": "gif", ".png": "apng", ".apng": "apng", ".rgb": "raw", ".raw": "raw"}
+
+# Looping flag of exported GIFs and APNGs, where 0 loops forever
+loop = 0
+
+# Shortest delay, in hundredths of a second, that viewers honor in a GIF; shorter frames are merged into the next one
+min_gif_delay = 2
+
+# Bytes every PNG file starts with
+png_signature = b"\x89PNG\r\n\x1a\n"
+
+
+# Records every finished frame to a file while it is started. Frames are captured from the surface handed to the frame
+# handlers and queued for a worker thread, which encodes each one as soon as it arrives and writes it straight to the
+# file, so memory stays flat however long the recording runs. When the encoder falls behind, frames are dropped and
+# counted in 'frames_dropped' instead of stalling the render loop, unless 'block' is set as for headless exports.
+# Each frame is shown for as long as it really was on screen, up to the next captured frame, so dropped frames and idle
+# stretches keep their real duration. With 'block' set, every frame lasts 1 / 'fps' seconds instead.
+class FrameRecorder:
+
+    def __init__(self, path, fps=60, block=False):
+        self.path = path
+        self.format = formats.get(os.path.splitext(path)[1].lower(), "png")
+        self.duration = 1000 / fps
+        self.block = block
+        self.frames = queue.Queue(queue_size)
+        self.worker = None
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_written = 0
+        self.error = None
+
+    @property
+    def recording(self):
+        return self.worker is not None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Starts capturing finished frames
+    def start(self):
+        self.worker = threading.Thread(target=self.encode, daemon=True)
+        self.worker.start()
+        shared_functions.frame_handlers.append(self.capture)
+
+    # Stops capturing frames, then waits for the queued ones to be written and closes the file
+    def stop(self):
+        shared_functions.frame_handlers.remove(self.capture)
+        self.frames.put(None)
+        self.worker.join()
+        self.worker = None
+        if self.error is not None:
+            raise self.error
+
+    # Frame handler which queues a copy of a finished frame for the encoder
+    def capture(self, surface):
+        frame = (surface.get_size(), pg.image.tobytes(surface, "RGB"), time.perf_counter())
+        self.frames_captured += 1
+        try:
+            self.frames.put(frame, block=self.block)
+        except queue.Full:
+            self.frames_dropped += 1
+
+    # Runs on the worker thread, writing queued frames until 'stop' queues None. Each frame is held back until the next
+    # one arrives, since how long it lasts isn't known until then; the last one lasts 1 / 'fps' seconds.
+    def encode(self):
+        writer = None
+        held = None
+        try:
+            while True:
+                frame = self.frames.get()
+                if held is not None:
+                    if frame is None or self.block:
+                        duration = self.duration
+                    else:
+                        duration = (frame[2] - held[2]) * 1000
+                    image = Image.frombytes("RGB", held[0], held[1])
+                    if writer is None:
+                        writer = writers[self.format](self.path, image.size)
+                    writer.write(image, duration)
+                    self.frames_written += 1
+                if frame is None:
+                    break
+                held = frame
+        except Exception as error:
+            self.error = error
+            while self.frames.get() is not None:
+                continue
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+# Writes each frame as a numbered PNG in a directory
+class PngSequenceWriter:
+
+    def __init__(self, path, size):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.count = 0
+
+    def write(self, image, duration):
+        image.save(os.path.join(self.path, f"frame_{self.count:06d}.png"))
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+# Appends each frame to a file as raw 8-bit RGB rows, top to bottom, with no header
+class RawWriter:
+
+    def __init__(self, path, size):
+        self.file = open(path, "wb")
+
+    def write(self, image, duration):
+        self.file.write(image.tobytes())
+
+    def close(self):
+        self.file.close()
+
+
+# Streams an animated GIF. Pillow encodes each frame as a GIF of its own with a palette chosen for that frame, and its
+# palette and image data are spliced into the animation as a frame with a local color table. Delays are whole hundredths
+# of a second, so each is rounded from the total time so far to keep rounding errors from adding up, and a frame too
+# short to be shown is replaced by the next one, which takes over its time.
+class GifWriter:
+
+    def __init__(self, path, size):
+        self.file = open(path, "wb")
+        self.held = None
+        self.held_duration = 0
+        self.elapsed = 0
+        self.delays = 0
+        self.file.write(b"GIF89a" + struct.pack("<HHBBB", size[0], size[1], 0x70, 0, 0))
+        self.file.write(b"!\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", loop) + b"\x00")
+
+    def write(self, image, duration):
+        if self.held is not None and self.held_duration < min_gif_delay * 10:
+            duration += self.held_duration
+        elif self.held is not None:
+            self.write_held()
+        self.held = image
+        self.held_duration = duration
+
+    # Writes the frame being held back, lasting until the end of its time
+    def write_held(self):
+        self.elapsed += self.held_duration
+        delay = round(self.elapsed / 10) - self.delays
+        self.delays += delay
+        encoded = io.BytesIO()
+        self.held.quantize(method=Image.Quantize.FASTOCTREE).save(encoded, "GIF", interlace=False)
+        data = encoded.getvalue()
+        flags = data[10]
+        table_end = 13 + (3 << ((flags & 7) + 1) if flags & 0x80 else 0)
+        position = table_end
+        while data[position:position + 1] == b"!":
+            position = skip_sub_blocks(data, position + 2)
+        descriptor = data[position:position + 10]
+        image_data = data[position + 10:data.rindex(b";")]
+        self.file.write(b"!\xf9\x04\x00" + struct.pack("<H", delay) + b"\x00\x00")
+        self.file.write(descriptor[:9] + bytes([descriptor[9] | 0x80 | (flags & 7)]) + data[13:table_end] + image_data)
+
+    def close(self):
+        if self.held is not None:
+            self.write_held()
+        self.file.write(b";")
+        self.file.close()
+
+
+# Streams an animated PNG. Pillow encodes each frame as a PNG of its own, and its image data is spliced into the
+# animation. The frame count in the header isn't known until the end, so it is filled in when the file is closed. Delays
+# are whole milliseconds, rounded from the total time so far.
+class ApngWriter:
+
+    def __init__(self, path, size):
+        self.file = open(path, "wb")
+        self.size = size
+        self.elapsed = 0
+        self.delays = 0
+        self.count = 0
+        self.sequence = 0
+        self.actl_position = None
+
+    def write(self, image, duration):
+        self.elapsed += duration
+        delay = round(self.elapsed) - self.delays
+        self.delays += delay
+        encoded = io.BytesIO()
+        image.save(encoded, "PNG")
+        chunks = read_chunks(encoded.getvalue())
+        if self.count == 0:
+            self.file.write(png_signature)
+            write_chunk(self.file, b"IHDR", chunks[0][1])
+            self.actl_position = self.file.tell()
+            write_chunk(self.file, b"acTL", struct.pack(">II", 0, loop))
+        write_chunk(self.file, b"fcTL", struct.pack(">IIIIIHHBB", self.next_sequence(), self.size[0], self.size[1], 0,
+                                                    0, delay, 1000, 0, 0))
+        for chunk_type, data in chunks:
+            if chunk_type == b"IDAT":
+                if self.count == 0:
+                    write_chunk(self.file, b"IDAT", data)
+                else:
+                    write_chunk(self.file, b"fdAT", struct.pack(">I", self.next_sequence()) + data)
+        self.count += 1
+
+    # Returns the next sequence number for an fcTL or fdAT chunk
+    def next_sequence(self):
+        self.sequence += 1
+        return self.sequence - 1
+
+    def close(self):
+        write_chunk(self.file, b"IEND", b"")
+        self.file.seek(self.actl_position)
+        write_chunk(self.file, b"acTL", struct.pack(">II", self.count, loop))
+        self.file.close()
+
+
+# Starts recording to 'path' if 'recorder' is None, or else stops 'recorder'. Returns the recorder in progress, if any.
+def toggle(recorder, path, fps=60):
+    if recorder is not None:
+        recorder.stop()
+        return None
+    recorder = FrameRecorder(path, fps)
+    recorder.start()
+    return recorder
+
+
+# Frame writers by recording format
+writers = {"png": PngSequenceWriter, "raw": RawWriter, "gif": GifWriter, "apng": ApngWriter}
+
+
+# Returns the position just past a chain of GIF sub-blocks starting at 'position'
+def skip_sub_blocks(data, position):
+    while data[position]:
+        position += data[position] + 1
+    return position + 1
+
+
+# Splits a PNG file into a list of (chunk type, chunk data) pairs
+def read_chunks(data):
+    chunks = []
+    position = len(png_signature)
+    while position < len(data):
+        length, chunk_type = struct.unpack(">I4s", data[position:position + 8])
+        chunks.append((chunk_type, data[position + 8:position + 8 + length]))
+        position += length + 12
+    return chunks
+
+
+# Writes a PNG chunk, with its length and checksum
+def write_chunk(file, chunk_type, data):
+    file.write(struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data)))
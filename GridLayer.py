@@ -0,0 +1,82 @@
+import numpy as np
+import pygame as pg
+import profiler
+
+# Color of the transparent background of the layer
+key_color = (255, 255, 255)
+
+# A pan is reused as a scroll of the layer when it moves the grid by whole pixels to within this tolerance
+scroll_tolerance = 1e-3
+
+
+# An off-screen surface holding the grid lines and bold axes of a complex plane. It is only redrawn when the view
+# changes; a pure pan scrolls the existing layer and redraws only the newly exposed strips, unless the grid is mapped
+# through a function or turned. Turned lines are rasterized differently depending on where they start, so strips drawn
+# next to scrolled lines wouldn't join them exactly.
+class GridLayer:
+
+    def __init__(self, plane):
+        self.plane = plane
+        self.surface = pg.Surface(plane.screen.get_size())
+        self.surface.set_colorkey(key_color)
+        self.key = None
+        self.view = None
+        self.scrolled = np.zeros(2)
+
+    # Blits the layer to a surface, bringing it up to date with the plane's view first
+    def draw(self, surface):
+        self.update()
+        surface.blit(self.surface, (0, 0))
+
+    # Brings the layer up to date with the plane's view
+    def update(self):
+        plane = self.plane
+        key = (plane.spacing, plane.half_range, plane.phase, plane.real_mode, plane.grid_map)
+        if key != self.key or self.view is None:
+            self.render()
+            self.reset_view()
+        elif plane.view is not self.view:
+            shift = plane.view.shift_from(self.view) - self.scrolled
+            pixel_shift = np.rint(shift)
+            if plane.grid_map is None and self.axis_aligned() and np.all(np.abs(shift - pixel_shift) <= scroll_tolerance) \
+                    and np.all(np.abs(pixel_shift) < self.surface.get_size()):
+                if np.any(pixel_shift):
+                    self.scroll(int(pixel_shift[0]), int(pixel_shift[1]))
+                    self.scrolled += pixel_shift
+            else:
+                self.render()
+                self.reset_view()
+        self.key = key
+
+    # Checks if the grid lines run along the pixel rows and columns of the layer, which is when the phase of the view is a
+    # multiple of a right angle
+    def axis_aligned(self):
+        return self.plane.view.cos == 0 or self.plane.view.sin == 0
+
+    # Records that the layer was last fully rendered for the plane's current view
+    def reset_view(self):
+        self.view = self.plane.view
+        self.scrolled = np.zeros(2)
+
+    # Redraws the layer, or only the part of it within 'area'
+    def render(self, area=None):
+        self.surface.set_clip(area)
+        self.surface.fill(key_color)
+        with profiler.stage("add_grid"):
+            self.plane.add_grid(self.surface)
+        with profiler.stage("add_bold_axes"):
+            self.plane.add_bold_axes(self.surface)
+        self.surface.set_clip(None)
+
+    # Scrolls the layer by a whole number of pixels and redraws the strips which were scrolled into view
+    def scroll(self, dx, dy):
+        width, height = self.surface.get_size()
+        self.surface.scroll(dx, dy)
+        if dx > 0:
+            self.render(pg.Rect(0, 0, dx, height))
+        elif dx < 0:
+            self.render(pg.Rect(width + dx, 0, -dx, height))
+        if dy > 0:
+            self.render(pg.Rect(0, 0, width, dy))
+        elif dy < 0:
+            self.render(pg.Rect(0, height + dy, width, -dy))
@@ -1,9 +1,8 @@
-import pygame as pg
+import time
+import threading
+import launcher
 import tkinter as tk
 import tkinter.messagebox as tkmb
-import animate_complex
-from animate_euler import animate_euler
-from PIL import Image, ImageTk
 
 # Display variables
 root_width_times_height = "800x800"
@@ -15,6 +14,11 @@ title = "Welcome to the World of Complex Numbers!"
 real_button_title = "Explore the Real Number Line"
 cmplx_button_title = "Explore the Complex Plane"
 euler_button_title = "Visualize Euler's Formula"
+epicycle_button_title = "Draw with Fourier Epicycles"
+logo_name = "logo.jpg"
+logo_poll_interval = 20
+worker_poll_interval = 100
+close_timeout = 2
 msg = """
 Instructions for the real number line and complex plane
 
@@ -25,6 +29,7 @@ To add up all of the numbers currently selected, press the + button.
 To multiply all of the numbers currently selected, press the x button.
 To rotate clockwise in the complex plane, press the button with a curved arrow pointing clockwise.
 To rotate counterclockwise in the complex plane, press the button with a curved arrow pointing counterclockwise.
+To start or stop recording the animation to a GIF, press F5.
 There is a range limit, so you will not be able to zoom in or out past a certain point, and additions or multiplications 
 that would result in numbers outside the range limit are not allowed.
 TIP: to get rid of all the numbers currently selected on the screen, multiply by zero.
@@ -34,12 +39,19 @@ About the Euler’s formula visualization
 
 This shows the standard (real + imaginary) representation of complex numbers on the unit circle along with
  the e^(i * theta) representation, demonstrating Euler's formula. For more explanation, read the accompanying document. 
+
+The Fourier epicycles visualization chains many of these rotating e^(i * theta) arrows tip to tail, each with its own
+ length, speed and starting angle, and traces a star with the tip of the last one.
 """
 
 
 class Menu:
 
-    def __init__(self):
+    # If a 'start_time' from time.perf_counter is given, how long the menu took to show up and how long each warm-up
+    # import took are printed. If 'warm_up' is set, a spare visualization process is started as soon as the menu shows.
+    def __init__(self, start_time=None, warm_up=True):
+        self.start_time = start_time
+        self.warm_up = warm_up
         self.root = tk.Tk()
         self.setup_root()
         self.top_bar = tk.Frame(self.root)
@@ -57,14 +69,54 @@ class Menu:
         self.setup_cmplx_animation_button()
         self.euler_animation_button = tk.Button(self.button_region)
         self.setup_euler_animation_button()
+        self.epicycle_animation_button = tk.Button(self.button_region)
+        self.setup_epicycle_animation_button()
         self.logo_label = tk.Label(self.root)
         self.logo_label.pack()
         self.logo = None
-        self.setup_logo()
+        self.logo_loaded = threading.Event()
+        self.status_label = tk.Label(self.root)
+        self.setup_status_label()
 
+    # Shows the menu. The logo and the spare visualization process wait until the window is up.
     def display(self):
+        self.root.after_idle(self.on_shown)
         self.root.mainloop()
 
+    def on_shown(self):
+        self.report_time("menu shown")
+        threading.Thread(target=self.load_logo, daemon=True).start()
+        self.setup_logo()
+        if self.warm_up:
+            launcher.prespawn()
+        self.poll_workers()
+
+    # Decodes the logo. Runs on a background thread.
+    def load_logo(self):
+        import assets
+        assets.load_pil_image(logo_name)
+        self.logo_loaded.set()
+        self.report_time("logo loaded")
+
+    # Shows what the visualization processes have reported since the last check, then checks again a little later
+    def poll_workers(self):
+        for name, message in launcher.poll():
+            if message[0] == "timing":
+                self.report_time("spare worker " + message[1])
+            elif message[0] == "result" and message[2] is not None:
+                text = f"{name}: the {message[1]} is {message[2]}"
+                for value, reason in message[3]:
+                    text += f"\n{value} was left out since {reason}"
+                self.status_label.config(text=text)
+            elif message[0] in ("status", "error"):
+                self.status_label.config(text=message[1])
+        self.root.after(worker_poll_interval, self.poll_workers)
+
+    # Prints how long it has been since startup, if startup is being timed
+    def report_time(self, event):
+        if self.start_time is not None:
+            print(f"{event} after {(time.perf_counter() - self.start_time) * 1000:.1f} ms")
+
     def setup_root(self):
         self.root.geometry(root_width_times_height)
         self.root.configure(background='white')
@@ -81,27 +133,42 @@ class Menu:
 
     def setup_real_animation_button(self):
         self.real_animation_button.config(font=(font, normal_font_size))
-        self.real_animation_button.config(text=real_button_title, command=animate_complex.animate_real)
+        self.real_animation_button.config(text=real_button_title, command=lambda: launcher.launch("real"))
         self.real_animation_button.pack(side=tk.LEFT)
 
     def setup_cmplx_animation_button(self):
         self.cmplx_animation_button.config(font=(font, normal_font_size))
-        self.cmplx_animation_button.config(text=cmplx_button_title, command=animate_complex.animate_complex)
+        self.cmplx_animation_button.config(text=cmplx_button_title, command=lambda: launcher.launch("complex"))
         self.cmplx_animation_button.pack(side=tk.LEFT)
 
     def setup_euler_animation_button(self):
         self.euler_animation_button.config(font=(font, normal_font_size))
-        self.euler_animation_button.config(text=euler_button_title, command=animate_euler)
+        self.euler_animation_button.config(text=euler_button_title, command=lambda: launcher.launch("euler"))
         self.euler_animation_button.pack(side=tk.LEFT)
 
+    def setup_epicycle_animation_button(self):
+        self.epicycle_animation_button.config(font=(font, normal_font_size))
+        self.epicycle_animation_button.config(text=epicycle_button_title, command=lambda: launcher.launch("epicycles"))
+        self.epicycle_animation_button.pack(side=tk.LEFT)
+
+    # Shows the logo once the background thread has decoded it
     def setup_logo(self):
-        self.logo = ImageTk.PhotoImage(Image.open("images/logo.jpg"))
+        if not self.logo_loaded.is_set():
+            self.root.after(logo_poll_interval, self.setup_logo)
+            return
+        import assets
+        from PIL import ImageTk
+        self.logo = ImageTk.PhotoImage(assets.load_pil_image(logo_name))
         self.logo_label.config(image=self.logo)
 
+    def setup_status_label(self):
+        self.status_label.config(font=(font, normal_font_size), background='white')
+        self.status_label.pack()
+
     def display_popup(self):
         tkmb.showinfo("information", self.msg_text)
 
+    # Closes the visualizations, giving them 'close_timeout' seconds to quit on their own, then closes the menu
     def quit(self):
+        launcher.close_all(close_timeout)
         self.root.destroy()
-
-
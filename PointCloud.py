@@ -0,0 +1,60 @@
+import numpy as np
+import pygame as pg
+
+
+# A large set of complex numbers drawn as a scatter plot on a complex plane, such as eigenvalues, roots or random
+# samples. Instead of drawing circles one at a time, every frame projects all of the points as arrays and stamps a disk
+# of 'radius' pixels around each of them with 'draw_stamps'.
+class PointCloud:
+
+    def __init__(self, plane, coords, color, radius):
+        self.plane = plane
+        self.coords = np.asarray(coords, dtype=np.complex128).ravel()
+        self.color = color
+        self.radius = radius
+        offsets = np.arange(-radius, radius + 1)
+        dx, dy = np.meshgrid(offsets, offsets, indexing="ij")
+        inside = dx ** 2 + dy ** 2 <= radius ** 2
+        self.stamp = list(zip(dx[inside].tolist(), dy[inside].tolist()))
+
+    # Returns the unrounded pixel coordinates of every point in the plane's view as x and y arrays
+    def project(self):
+        view = self.plane.view
+        local = (self.coords - view.origin) - view.origin_lo
+        xs = view.linear[0, 0] * local.real + view.linear[0, 1] * local.imag + view.center[0]
+        ys = view.linear[1, 0] * local.real + view.linear[1, 1] * local.imag + view.center[1]
+        return xs, ys
+
+    # Draws every point within the screen to a surface
+    def draw(self, surface):
+        draw_stamps(surface, *self.project(), self.color, self.stamp)
+
+
+# Returns the offsets from its center of the pixels pygame fills when drawing a circle of 'radius' pixels, at least one,
+# so that stamped points look just like points drawn with pg.draw.circle
+def disk_stamp(radius):
+    size = 2 * radius + 1
+    disk = pg.Surface((size, size))
+    pg.draw.circle(disk, (255, 255, 255), (radius, radius), radius)
+    dx, dy = np.nonzero(pg.surfarray.array2d(disk))
+    return list(zip((dx - radius).tolist(), (dy - radius).tolist()))
+
+
+# Fills the pixels of 'stamp' around each point at pixel coordinates 'xs', 'ys' on a surface. The rounded points are
+# marked in a boolean mask of the screen, which is then ORed with itself shifted by every offset of the stamp, so the
+# cost depends on the screen and stamp sizes rather than on the number of points.
+def draw_stamps(surface, xs, ys, color, stamp):
+    width, height = surface.get_size()
+    r = max(max(abs(dx), abs(dy)) for dx, dy in stamp)
+    xs, ys = np.rint(xs), np.rint(ys)
+    near = (xs >= -r) & (xs < width + r) & (ys >= -r) & (ys < height + r)
+    centers = np.zeros((width + 2 * r, height + 2 * r), dtype=bool)
+    centers[xs[near].astype(np.intp) + r, ys[near].astype(np.intp) + r] = True
+    covered = np.zeros((width, height), dtype=bool)
+    for dx, dy in stamp:
+        covered |= centers[r - dx:r - dx + width, r - dy:r - dy + height]
+    pixels = pg.surfarray.pixels2d(surface)
+    try:
+        pixels[covered] = surface.map_rgb(color)
+    finally:
+        del pixels
@@ -0,0 +1,75 @@
+import numpy as np
+
+# Number of slots a new store starts with; it doubles whenever it runs out
+initial_capacity = 64
+
+
+# Stores the distinct points plotted on a complex plane in growable columns, so that every frame can read all of them
+# as arrays. Each point has one slot, found through a dict, and a count of how many times it was added. Removing the
+# last copy of a point moves the point in the final slot into its place, so adding and removing take constant time.
+class PointStore:
+
+    def __init__(self):
+        self.coords = np.zeros(initial_capacity, dtype=np.complex128)
+        self.counts = np.zeros(initial_capacity, dtype=int)
+        self.label_sizes = np.zeros((initial_capacity, 2), dtype=int)
+        self.displayed = np.zeros(initial_capacity, dtype=bool)
+        self.size = 0
+        self.slots = {}
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, coords):
+        return coords in self.slots
+
+    # Adds a copy of a point, giving it a slot if it is new, and returns its slot
+    def add(self, coords, label_size):
+        if coords in self.slots:
+            slot = self.slots[coords]
+            self.counts[slot] += 1
+            return slot
+        if self.size == len(self.coords):
+            self.grow()
+        slot = self.size
+        self.coords[slot] = coords
+        self.counts[slot] = 1
+        self.label_sizes[slot] = label_size
+        self.displayed[slot] = False
+        self.slots[coords] = slot
+        self.size += 1
+        return slot
+
+    # Removes a copy of a point, returning True if it was the last one and the point no longer has a slot
+    def remove(self, coords):
+        slot = self.slots[coords]
+        self.counts[slot] -= 1
+        if self.counts[slot] > 0:
+            return False
+        last = self.size - 1
+        del self.slots[coords]
+        if slot != last:
+            for column in (self.coords, self.counts, self.label_sizes, self.displayed):
+                column[slot] = column[last]
+            self.slots[self.coords[slot].item()] = slot
+        self.size = last
+        return True
+
+    # Returns how many copies of a point have been added
+    def count(self, coords):
+        return self.counts[self.slots[coords]] if coords in self.slots else 0
+
+    # Returns the distinct points as an array, in slot order
+    def values(self):
+        return self.coords[:self.size]
+
+    # Returns every added copy of every point as a list
+    def to_list(self):
+        return np.repeat(self.coords[:self.size], self.counts[:self.size]).tolist()
+
+    # Doubles the number of slots
+    def grow(self):
+        self.coords = np.concatenate((self.coords, np.zeros_like(self.coords)))
+        self.counts = np.concatenate((self.counts, np.zeros_like(self.counts)))
+        self.label_sizes = np.concatenate((self.label_sizes, np.zeros_like(self.label_sizes)))
+        self.displayed = np.concatenate((self.displayed, np.zeros_like(self.displayed)))
@@ -0,0 +1,50 @@
+import pygame as pg
+import shared_functions
+
+
+# Easing functions map the fraction of a transition's duration which has passed to the fraction of its change to apply
+
+def linear(t):
+    return t
+
+
+def ease_in_out(t):
+    return t * t * (3 - 2 * t)
+
+
+def ease_out(t):
+    return 1 - (1 - t) ** 2
+
+
+# Drives transitions by wall-clock time. Frames are capped at 'fps_cap' per second, and when rendering a frame takes
+# longer than that the transition jumps ahead, skipping the frames it had no time for, so that it still ends on time.
+# Headless rendering steps a fixed 1 / 'fps_cap' seconds per frame instead, so that recorded animations are identical.
+class Scheduler:
+
+    def __init__(self, fps_cap):
+        self.fps_cap = fps_cap
+        self.clock = pg.time.Clock()
+        self.frames_rendered = 0
+        self.frames_skipped = 0
+
+    # Runs a transition lasting 'duration' seconds. Every frame, 'step' is called with the eased fraction of the
+    # transition which should be complete by then, and then 'render' is called to draw the frame.
+    def run(self, duration, step, render, easing=ease_in_out):
+        elapsed = 0
+        self.clock.tick()
+        while elapsed < duration:
+            step(easing(elapsed / duration))
+            render()
+            elapsed += self.wait()
+        step(1)
+        render()
+        self.frames_rendered += 1
+
+    # Waits out the rest of the frame and returns the number of seconds it lasted
+    def wait(self):
+        self.frames_rendered += 1
+        if shared_functions.headless:
+            return 1 / self.fps_cap
+        seconds = self.clock.tick(self.fps_cap) / 1000
+        self.frames_skipped += max(int(seconds * self.fps_cap) - 1, 0)
+        return seconds
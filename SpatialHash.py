@@ -0,0 +1,30 @@
+# Buckets rects into a uniform grid of square cells so that collision queries only look at rects in nearby cells
+class SpatialHash:
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    # Removes all rects from the index
+    def clear(self):
+        self.cells.clear()
+
+    # Adds a rect to every cell it overlaps, under the given key
+    def insert(self, key, rect):
+        for cell in self.cells_for(rect):
+            if cell in self.cells:
+                self.cells[cell].append(key)
+            else:
+                self.cells[cell] = [key]
+
+    # Yields the keys of all rects sharing a cell with the given rect. A key is repeated for every cell it shares.
+    def query(self, rect):
+        for cell in self.cells_for(rect):
+            if cell in self.cells:
+                yield from self.cells[cell]
+
+    # Lists the cells a rect overlaps
+    def cells_for(self, rect):
+        left, top = rect.left // self.cell_size, rect.top // self.cell_size
+        right, bottom = (rect.right - 1) // self.cell_size, (rect.bottom - 1) // self.cell_size
+        return [(x, y) for x in range(left, right + 1) for y in range(top, bottom + 1)]
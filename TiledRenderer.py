@@ -0,0 +1,129 @@
+import concurrent.futures
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+import pygame as pg
+from DomainColoring import color_values
+
+# Number of row bands each render is split into, and the rows a worker colors between checks for cancellation
+band_count = 16
+chunk_rows = 16
+
+# Color the layer starts out filled with, before its first render finishes
+background = 255
+
+# Posted whenever a band of a current render finishes, so that an event-driven loop knows to redraw
+layer_updated = pg.event.custom_type()
+
+# Set in each worker process by 'init_worker': the number of the latest render, and the lock guarding it
+generation = None
+generation_lock = None
+
+
+# A domain-coloring layer like DomainColoring, for functions too expensive to evaluate on one core. Each render is split
+# into row bands which a pool of processes colors straight into a shared-memory buffer, and the layer's surface is a
+# view of that buffer, so finished bands show up without any copying. When the view changes mid-render, the stale
+# bands are cancelled: each worker checks the render's generation number before every chunk of rows it writes.
+# 'func' must be picklable, such as a function defined at the top level of a module.
+class TiledRenderer:
+
+    def __init__(self, plane, func, workers=None):
+        self.plane = plane
+        self.func = func
+        width, height = plane.screen.get_size()
+        self.memory = shared_memory.SharedMemory(create=True, size=width * height * 3)
+        self.pixels = np.ndarray((height, width, 3), dtype=np.uint8, buffer=self.memory.buf)
+        self.pixels[:] = background
+        self.surface = pg.image.frombuffer(self.memory.buf, (width, height), "RGB")
+        context = multiprocessing.get_context("spawn")
+        self.generation = context.Value("i", 0, lock=False)
+        self.lock = context.Lock()
+        self.executor = concurrent.futures.ProcessPoolExecutor(workers, context, init_worker,
+                                                               (self.generation, self.lock))
+        self.futures = []
+        self.error = None
+        self.view = None
+
+    # Checks whether a render is still in progress
+    @property
+    def rendering(self):
+        return any(not future.done() for future in self.futures)
+
+    # Blits the layer to a surface, starting a new render first if the plane's view has changed
+    def draw(self, surface):
+        if self.error is not None:
+            raise self.error
+        if self.plane.view is not self.view:
+            self.view = self.plane.view
+            self.render()
+        surface.blit(self.surface, (0, 0))
+
+    # Cancels any render in progress and starts rendering the plane's view
+    def render(self):
+        with self.lock:
+            self.generation.value += 1
+            current = self.generation.value
+        for future in self.futures:
+            future.cancel()
+        height = self.pixels.shape[0]
+        bounds = np.linspace(0, height, band_count + 1).astype(int)
+        self.futures = [self.executor.submit(render_band, self.memory.name, self.pixels.shape, top, bottom,
+                                             self.view, self.func, current)
+                        for top, bottom in zip(bounds[:-1], bounds[1:]) if bottom > top]
+        for future in self.futures:
+            future.add_done_callback(self.band_done)
+
+    # Waits for the render in progress to finish
+    def wait(self):
+        concurrent.futures.wait(self.futures)
+        if self.error is not None:
+            raise self.error
+
+    # Lets the main loop know a band is ready to be shown, or records why it failed
+    def band_done(self, future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.error = future.exception()
+        elif future.result() and pg.display.get_init():
+            pg.event.post(pg.event.Event(layer_updated))
+
+    # Stops the workers and frees the shared buffer. The layer can't be drawn afterwards.
+    def close(self):
+        with self.lock:
+            self.generation.value += 1
+        self.executor.shutdown(cancel_futures=True)
+        del self.surface, self.pixels
+        self.memory.close()
+        self.memory.unlink()
+
+
+# Stores the shared render generation in a worker process
+def init_worker(shared_generation, shared_lock):
+    global generation, generation_lock
+    generation, generation_lock = shared_generation, shared_lock
+
+
+# Runs in a worker process, coloring the rows from 'top' to 'bottom' of the shared buffer named 'name' by 'func' in
+# 'view'. Returns False if the render was cancelled before the band was finished.
+def render_band(name, shape, top, bottom, view, func, current):
+    memory = shared_memory.SharedMemory(name=name)
+    pixels = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)
+    try:
+        xs = np.arange(shape[1])
+        for start in range(top, bottom, chunk_rows):
+            if generation.value != current:
+                return False
+            end = min(start + chunk_rows, bottom)
+            z = view.to_plane_grid(xs, np.arange(start, end)).T.ravel()
+            with np.errstate(all="ignore"):
+                values = np.asarray(func(z), dtype=np.complex128) * np.ones_like(z)
+                colors = color_values(values).reshape(end - start, shape[1], 3)
+            with generation_lock:
+                if generation.value != current:
+                    return False
+                pixels[start:end] = colors
+        return True
+    finally:
+        del pixels
+        memory.close()
@@ -0,0 +1,81 @@
+import numpy as np
+import double_double
+
+# A phase is taken as a multiple of a right angle when its cos or sin is within this of zero, so that np.cos(np.pi / 2)
+# doesn't tilt the grid lines by a rounding error
+right_angle_tolerance = 1e-12
+
+
+# Holds the affine transform between complex plane coordinates and pixel coordinates for one view of a complex plane.
+# A new one is built whenever the view changes, so drawing and hit-testing never recompute trig or screen sizes.
+# The offset is a double-double number (offset, offset_lo), and points are measured from the center of the view before
+# they are scaled, so pixel math stays exact to well under a pixel however far the view is zoomed in.
+class ViewTransform:
+
+    def __init__(self, width, height, spacing, half_range, phase, offset, offset_lo=0j):
+        self.width = width
+        self.height = height
+        self.center = np.array([width / 2, height / 2])
+        self.cos = np.cos(phase)
+        self.sin = np.sin(phase)
+        if abs(self.cos) < right_angle_tolerance:
+            self.cos, self.sin = 0.0, np.sign(self.sin)
+        elif abs(self.sin) < right_angle_tolerance:
+            self.cos, self.sin = np.sign(self.cos), 0.0
+        self.rotation = np.array([[self.cos, self.sin], [-self.sin, self.cos]])
+        self.scale_x = width / (2 * half_range)
+        self.scale_y = height / (2 * half_range)
+        self.pixel_size = 1 / self.scale_x
+        self.pixel_spacing = self.scale_x * spacing
+        self.pixel_offset = self.scale_x * offset.real, self.scale_y * offset.imag
+        self.grid_phase = (self.scale_x * double_double.mod((offset.real, offset_lo.real), spacing),
+                           self.scale_y * double_double.mod((offset.imag, offset_lo.imag), spacing))
+        self.origin = complex(-offset.real, offset.imag)
+        self.origin_lo = complex(-offset_lo.real, offset_lo.imag)
+        self.linear = self.rotation @ np.diag([self.scale_x, -self.scale_y])
+        self.inverse = np.linalg.inv(self.linear)
+
+    # Maps an array of complex plane coordinates to an (n, 2) array of pixel coordinates
+    def to_pixels(self, plane_coords):
+        local = (plane_coords - self.origin) - self.origin_lo
+        return np.column_stack((local.real, local.imag)) @ self.linear.T + self.center
+
+    # Maps an (n, 2) array of pixel coordinates to an array of complex plane coordinates
+    def to_plane(self, pixel_coords):
+        pts = (pixel_coords - self.center) @ self.inverse.T
+        return self.origin + (self.origin_lo + (pts[:, 0] + pts[:, 1] * 1j))
+
+    # Maps every pixel of a grid to complex plane coordinates, returning a (len(xs), len(ys)) array. Since the transform
+    # is affine, this only takes one multiplication per row and per column.
+    def to_plane_grid(self, xs, ys):
+        steps = self.inverse[0] + self.inverse[1] * 1j
+        local = ((xs - self.center[0]) * steps[0])[:, np.newaxis] + ((ys - self.center[1]) * steps[1])[np.newaxis, :]
+        return self.origin + (self.origin_lo + local)
+
+    # Returns how far everything drawn in 'other' view has moved on the screen in this view, as an (x, y) array. Only
+    # meaningful when the two views differ by their offset alone.
+    def shift_from(self, other):
+        delta = (self.origin - other.origin) + (self.origin_lo - other.origin_lo)
+        return -(self.linear @ np.array([delta.real, delta.imag]))
+
+    # Rotates a single point by the view's phase about the center of the screen
+    def rotate(self, pt):
+        x, y = pt[0] - self.center[0], pt[1] - self.center[1]
+        return self.cos * x + self.sin * y + self.center[0], -self.sin * x + self.cos * y + self.center[1]
+
+    # Undoes the rotation of a single point by the view's phase about the center of the screen
+    def unrotate(self, pt):
+        x, y = pt[0] - self.center[0], pt[1] - self.center[1]
+        return self.cos * x - self.sin * y + self.center[0], self.sin * x + self.cos * y + self.center[1]
+
+    # Rotates an (n, 2) array of points by the view's phase about the center of the screen
+    def rotate_array(self, pts):
+        return (pts - self.center) @ self.rotation.T + self.center
+
+    # Checks whether a point lies within the screen
+    def in_screen(self, pt):
+        return 0 <= pt[0] <= self.width and 0 <= pt[1] <= self.height
+
+    # Checks which points of an (n, 2) array lie within the screen
+    def in_screen_array(self, pts):
+        return (pts[:, 0] >= 0) & (pts[:, 0] <= self.width) & (pts[:, 1] >= 0) & (pts[:, 1] <= self.height)
@@ -1,7 +1,14 @@
 import sys
 import math
+import assets
+import launcher
 import cmplx_animation_utils
+import render_cache
+import profiler
+import FrameRecorder
 from ComplexPlane import ComplexPlane
+from DomainColoring import DomainColoring
+from TiledRenderer import TiledRenderer, layer_updated
 from Button import Button
 from shared_functions import *
 
@@ -17,9 +24,14 @@ initial_spacing = 1
 initial_half_range = 5
 range_multiplier = 1.1
 phase_step = 0.01
+frame_interval = 16
+idle_timeout = 1000
+zoom_interval = 50
 button_top_left_y = 50
 button_step = 60
 real_line_click_tolerance = 3
+parallel_reduction_threshold = 8
+recording_path = "recording.gif"
 real_button_pic_addresses = [("home.jpg", "home1.jpg"),  ("plus.jpg", "plus1.jpg"), ("times.jpg", "times1.jpg")]
 cmplx_button_pic_addresses = [("rotate_c.jpg", "rotate_c1.jpg"), ("rotate_cc.jpg", "rotate_cc1.jpg")]
 real_button_names = ["home", "plus", "times"]
@@ -32,7 +44,7 @@ def get_buttons():
     button_pic_addresses = real_button_pic_addresses[::-1] if plane.real_mode else cmplx_button_pic_addresses[::-1] \
         + real_button_pic_addresses[::-1]
     button_names = real_button_names[::-1] if plane.real_mode else cmplx_button_names[::-1] + real_button_names[::-1]
-    button_pics = [[pg.image.load("images/" + button_pic_address[i]) for i in range(2)] for button_pic_address
+    button_pics = [[assets.get_image(button_pic_address[i]) for i in range(2)] for button_pic_address
                    in button_pic_addresses]
     buttons = [Button(screen, width - button_step * (i + 1), button_top_left_y, button_pics[i][0],
                       button_pics[i][1])
@@ -46,13 +58,19 @@ plane = None
 buttons = None
 
 
-# Executes the animation loop
-def animate(real_mode):
+# Executes the animation loop. If a complex function 'func' is given, the plane is domain colored by it, across several
+# processes if 'tiled' is set. If a complex function 'grid_map' is given, the grid is drawn mapped through it.
+def animate(real_mode, func=None, tiled=False, grid_map=None):
 
     global screen
     screen = create_screen(width, height)
     global plane
     plane = ComplexPlane(screen, initial_spacing, initial_half_range, real_mode=real_mode)
+    layer = None
+    if func is not None:
+        layer = TiledRenderer(plane, func) if tiled else DomainColoring(plane, func)
+        plane.layers.append(layer)
+    plane.set_grid_map(grid_map)
     global buttons
     buttons = get_buttons()
 
@@ -64,35 +82,43 @@ def animate(real_mode):
     time_clicked_down = -100
     zoom_in = False
     zoom_out = False
-    cmplx_animation_utils.funcs += [display_buttons, adjust_spacing]
+    cmplx_animation_utils.funcs += [display_buttons]
+    last_zoom_time = 0
+    recorder = None
     running = True
 
-    # Main loop
+    # Main loop: sleeps until something happens, then handles all queued events with at most one view change and redraw
     while running:
-        adjust_spacing()
-        pg.display.flip()
-        prev_mouse_pos = pg.mouse.get_pos()
-        for event in pg.event.get():
+        update_display(screen)
+        busy = zoom_in or zoom_out or pg.mouse.get_pressed()[0]
+        events = wait_for_events(frame_interval if busy else idle_timeout)
+        pan_x_diff = 0
+        pan_y_diff = 0
+        layer_changed = False
+        for event in events:
 
             if event.type == pg.QUIT:
                 running = False
 
+            # Redraws the whole window if it has been uncovered
+            elif event.type == pg.VIDEOEXPOSE:
+                mark_all_dirty()
+
+            # Redraws the plane once more of a layer rendering in the background is ready. The layer covers the whole
+            # window, so all of it is shown again.
+            elif event.type == layer_updated:
+                layer_changed = True
+                mark_all_dirty()
+
             # Sets 'pan' to True and records the click time so a point can be plotted if there's a rapid release
             elif event.type == pg.MOUSEBUTTONDOWN:
                 pan = True
                 time_clicked_down = pg.time.get_ticks()
 
-            # If 'pan' is True (the mouse button is down) and the mouse is moving, pans the screen
+            # If 'pan' is True (the mouse button is down) and the mouse is moving, adds up the motion to pan the screen by
             elif event.type == pg.MOUSEMOTION and pan:
-                mouse_pos = event.pos
-                x_diff = mouse_pos[0] - prev_mouse_pos[0]
-                y_diff = mouse_pos[1] - prev_mouse_pos[1]
-                rot_x_diff = x_diff * math.cos(plane.phase) - y_diff * math.sin(plane.phase)
-                rot_x_offset = rot_x_diff * 2 * plane.half_range / width
-                rot_y_diff = x_diff * math.sin(plane.phase) + y_diff * math.cos(plane.phase)
-                rot_y_offset = rot_y_diff * 2 * plane.half_range / width
-                plane.set_offset((plane.offset + rot_x_offset + rot_y_offset * 1j))
-                wipe_and_redisplay()
+                pan_x_diff += event.rel[0]
+                pan_y_diff += event.rel[1]
 
             # Sets 'pan' to False if the mouse is released and plots a point if the release happened right after a press
             elif event.type == pg.MOUSEBUTTONUP:
@@ -107,8 +133,16 @@ def animate(real_mode):
                     plane.add_coords(coord)
                     plane.display_coords()
 
-            # If the up arrow or down arrow is pressed, prepares to zoom in or out, respectively
+            # If the up arrow or down arrow is pressed, prepares to zoom in or out, respectively. F3 shows or hides the
+            # profiler overlay, F4 writes the profiled frame timings to a CSV file, and F5 starts or stops recording.
             elif event.type == pg.KEYDOWN:
+                if event.key == pg.K_F3:
+                    profiler.toggle_overlay()
+                    wipe_and_redisplay()
+                elif event.key == pg.K_F4:
+                    profiler.dump_csv()
+                elif event.key == pg.K_F5:
+                    recorder = FrameRecorder.toggle(recorder, recording_path, cmplx_animation_utils.fps_cap)
                 keys = pg.key.get_pressed()
                 if keys[pg.K_UP]:
                     zoom_in = True
@@ -123,14 +157,33 @@ def animate(real_mode):
                 if not keys[pg.K_DOWN]:
                     zoom_out = False
 
-        # Performs a zoom in or zoom out
-        if zoom_in or zoom_out:
-            pg.time.wait(50)
+        # Quits if the menu which launched this window has asked it to close
+        if launcher.close_requested():
+            running = False
+
+        view_changed = False
+
+        # Pans the screen by all of the mouse motion since the last frame
+        if pan_x_diff or pan_y_diff:
+            rot_x_diff = pan_x_diff * plane.view.cos - pan_y_diff * plane.view.sin
+            rot_x_offset = rot_x_diff / plane.view.scale_x
+            rot_y_diff = pan_x_diff * plane.view.sin + pan_y_diff * plane.view.cos
+            rot_y_offset = rot_y_diff / plane.view.scale_y
+            plane.shift_offset(rot_x_offset + rot_y_offset * 1j)
+            view_changed = True
+
+        # Performs a zoom in or zoom out, at most once every 'zoom_interval' milliseconds
+        if (zoom_in or zoom_out) and pg.time.get_ticks() - last_zoom_time >= zoom_interval:
+            last_zoom_time = pg.time.get_ticks()
             if zoom_in and plane.half_range > cmplx_animation_utils.lower_range_limit:
                 plane.set_half_range(plane.half_range / range_multiplier)
             if zoom_out and plane.half_range < cmplx_animation_utils.upper_range_limit:
                 plane.set_half_range(plane.half_range * range_multiplier)
-            wipe_and_redisplay()
+            view_changed = True
+
+        if view_changed or layer_changed:
+            with profiler.stage("redisplay"):
+                wipe_and_redisplay()
 
         if pg.mouse.get_pressed()[0]:
             for key, button in buttons.items():
@@ -146,12 +199,14 @@ def animate(real_mode):
             display_buttons()
 
         elif buttons["plus"].is_clicked():
-            cmplx_animation_utils.add(plane)
+            plan = cmplx_animation_utils.add(plane, parallel=len(plane.added_coords) >= parallel_reduction_threshold)
+            report_plan("sum", plan)
             buttons["plus"].unclick()
             display_buttons()
 
         elif buttons["times"].is_clicked():
-            cmplx_animation_utils.mul(plane)
+            plan = cmplx_animation_utils.mul(plane, parallel=len(plane.added_coords) >= parallel_reduction_threshold)
+            report_plan("product", plan)
             buttons["times"].unclick()
             display_buttons()
 
@@ -168,20 +223,26 @@ def animate(real_mode):
             wipe_and_redisplay()
             buttons["rotate_cc"].unclick()
             display_buttons()
+    if recorder is not None:
+        recorder.stop()
+    if isinstance(layer, TiledRenderer):
+        layer.close()
+    render_cache.clear_fonts()
     pg.quit()
 
 
 # Displays all buttons to the screen
 def display_buttons():
-    for key, button in buttons.items():
-        button.display()
+    with profiler.stage("buttons"):
+        for key, button in buttons.items():
+            button.display()
 
 
-# Adjusts the spacing of the plane to keep the grid size reasonable
-def adjust_spacing():
-    if plane.half_range >= initial_half_range ** 2 * plane.spacing or plane.half_range <= plane.spacing:
-        plane.set_spacing(plane.half_range / initial_half_range)
-        wipe_and_redisplay()
+# Blocks until there is at least one event or until 'timeout' milliseconds pass, then returns all queued events
+def wait_for_events(timeout):
+    event = pg.event.wait(timeout)
+    events = [] if event.type == pg.NOEVENT else [event]
+    return events + pg.event.get()
 
 
 # Wipes the screen and redraws everything to it
@@ -191,12 +252,18 @@ def wipe_and_redisplay():
     display_buttons()
 
 
-# Creates a title for the window
-def set_title(real_mode):
-    if real_mode:
-        pg.display.set_caption(real_title)
-    else:
-        pg.display.set_caption(cmplx_title)
+# Creates a title for the window, listing the operands the last add or mul had to leave out, and why
+def set_title(real_mode, skipped=()):
+    title = real_title if real_mode else cmplx_title
+    if skipped:
+        title += " - left out " + "; ".join(str(value) + " since " + reason for value, reason in skipped)
+    pg.display.set_caption(title)
+
+
+# Reports the result of an add or mul, and the operands it left out, to the launcher and in the window's title
+def report_plan(operation, plan):
+    launcher.send("result", operation, plan.result, plan.skipped)
+    set_title(plane.real_mode, plan.skipped)
 
 
 # Convenience functions defining the real and complex animation modes
@@ -1,14 +1,28 @@
 import sys
-import pygame as pg
 import math
-from Euler import EulerCircle
+import numpy as np
+import pygame as pg
+import render_cache
+import FrameRecorder
+import launcher
+from Euler import EulerCircle, PhaseTable
+from Epicycles import Epicycles
 from shared_functions import *
 
 # Display parameters
 width = 800
 height = 800
-phase_step = 0.007
+phase_step = 0.035
+fps_cap = 60
 title = "Animated Euler's formula"
+recording_path = "euler.gif"
+
+# Epicycle parameters
+epicycle_title = "Fourier epicycles"
+epicycle_recording_path = "epicycles.gif"
+epicycle_path_samples = 1024
+epicycle_steps = 720
+star_inner_radius = 0.4
 
 
 def animate_euler():
@@ -16,20 +30,82 @@ def animate_euler():
     pg.display.set_caption(title)
     screen = create_screen(width, height)
     euler_circle = EulerCircle(screen)
-    euler_circle.display()
+    phase_table = PhaseTable(phase_step)
+    step = 0
+    drawn_rects = euler_circle.display()
+    clock = pg.time.Clock()
+    recorder = None
+    running = True
+
+    while running:
+        rects = euler_circle.display()
+        for rect in drawn_rects + rects:
+            mark_dirty(rect)
+        drawn_rects = rects
+        update_display(screen)
+        clock.tick(fps_cap)
+        for event in pg.event.get():
+            if event.type == pg.QUIT:
+                running = False
+
+            # F5 starts or stops recording the animation
+            elif event.type == pg.KEYDOWN and event.key == pg.K_F5:
+                recorder = FrameRecorder.toggle(recorder, recording_path, fps_cap)
+        if launcher.close_requested():
+            running = False
+
+        step = (step + 1) % phase_table.count
+        euler_circle.set_step(phase_table, step)
+    if recorder is not None:
+        recorder.stop()
+    render_cache.clear_fonts()
+    pg.quit()
+
+
+# Draws a five-pointed star with a chain of Euler's formula phasors, one for each term of the star's Fourier series
+def animate_epicycles():
+    pg.init()
+    pg.display.set_caption(epicycle_title)
+    screen = create_screen(width, height)
+    epicycles = Epicycles.from_path(screen, star_path(epicycle_path_samples))
+    step = 0
+    clock = pg.time.Clock()
+    recorder = None
     running = True
 
     while running:
         screen.fill(WHITE)
-        euler_circle.display()
-        pg.display.flip()
+        epicycles.display()
+        mark_all_dirty()
+        update_display(screen)
+        clock.tick(fps_cap)
         for event in pg.event.get():
             if event.type == pg.QUIT:
                 running = False
 
-        euler_circle.set_phase((euler_circle.phase + phase_step) % math.tau)
+            # F5 starts or stops recording the animation
+            elif event.type == pg.KEYDOWN and event.key == pg.K_F5:
+                recorder = FrameRecorder.toggle(recorder, epicycle_recording_path, fps_cap)
+        if launcher.close_requested():
+            running = False
+
+        step = (step + 1) % epicycle_steps
+        epicycles.set_phase(step * math.tau / epicycle_steps)
+    if recorder is not None:
+        recorder.stop()
+    render_cache.clear_fonts()
     pg.quit()
 
 
+# Returns 'count' points spaced evenly around the outline of a five-pointed star
+def star_path(count):
+    corner_radii = np.where(np.arange(10) % 2 == 0, 1, star_inner_radius)
+    corners = corner_radii * np.exp(1j * (np.pi / 2 + np.arange(10) * np.pi / 5))
+    edges = np.arange(count) * 10 / count
+    starts = corners[edges.astype(int)]
+    ends = corners[(edges.astype(int) + 1) % 10]
+    return starts + (ends - starts) * (edges % 1)
+
+
 if __name__ == "__main__":
     animate_euler()
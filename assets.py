@@ -0,0 +1,53 @@
+import os
+import threading
+import pygame as pg
+
+# Folder the images are loaded from
+image_folder = "images/"
+
+# Decoded images by file name, as pygame surfaces and as PIL images
+images = {}
+pil_images = {}
+
+# Images converted to a display's pixel format, by (file name, pixel format)
+converted = {}
+
+# Guards the caches, since images may be loaded on a background thread while they are being asked for
+lock = threading.RLock()
+
+
+# Returns an image from the image folder as a surface, only decoding it the first time it is asked for
+def load_image(name):
+    with lock:
+        if name not in images:
+            images[name] = pg.image.load(image_folder + name)
+        return images[name]
+
+
+# Returns an image converted to the pixel format of the display, so that blitting it needs no conversion. Conversions
+# are kept by pixel format, so they stay valid after the display is closed and opened again. The display must be open.
+def get_image(name):
+    display = pg.display.get_surface()
+    key = (name, display.get_bitsize(), display.get_masks())
+    with lock:
+        if key not in converted:
+            image = load_image(name)
+            converted[key] = image.convert_alpha() if image.get_alpha() is not None else image.convert()
+        return converted[key]
+
+
+# Returns an image from the image folder as a decoded PIL image, for use outside pygame
+def load_pil_image(name):
+    from PIL import Image
+    with lock:
+        if name not in pil_images:
+            image = Image.open(image_folder + name)
+            image.load()
+            pil_images[name] = image
+        return pil_images[name]
+
+
+# Decodes every image in the image folder ahead of time. Safe to run on a background thread.
+def preload():
+    for name in sorted(os.listdir(image_folder)):
+        load_image(name)
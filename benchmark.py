@@ -0,0 +1,153 @@
+import json
+import random
+import subprocess
+import sys
+import time
+import numpy as np
+import headless
+import shared_functions
+import cmplx_animation_utils
+from ComplexPlane import ComplexPlane
+
+# Color constants
+WHITE = (255, 255, 255)
+
+# Benchmark parameters
+width = 800
+height = 800
+spacing = 1
+half_range = 5
+display_counts = [10, 100, 1000, 10000]
+view_count = 1000
+label_counts = [100, 1000, 10000]
+label_count = 10000
+label_range = 1
+frames = 50
+reduction_count = 8
+parallel_reduction_count = 32
+percentiles = [50, 90, 95, 99]
+seed = 0
+
+
+# Returns a plane holding 'count' random points with two decimal places, spread over 'extent' around the origin
+def make_plane(screen, count, extent=half_range):
+    plane = ComplexPlane(screen, spacing, half_range)
+    rng = random.Random(seed)
+    for _ in range(count):
+        plane.add_coords(complex(round(rng.uniform(-extent, extent), 2), round(rng.uniform(-extent, extent), 2)))
+    return plane
+
+
+# Returns a plane holding 'count' random points near the unit circle, so that their product stays in view
+def make_unit_plane(screen, count):
+    plane = ComplexPlane(screen, spacing, half_range)
+    rng = random.Random(seed)
+    for _ in range(count):
+        plane.add_coords(complex(np.round(np.exp(1j * rng.uniform(0, 2 * np.pi)) * rng.uniform(0.9, 1.1), 2)))
+    return plane
+
+
+# Calls 'step' with each frame number, then times 'draw', returning the frame times in milliseconds
+def time_frames(draw, step=None):
+    times = []
+    for i in range(frames):
+        if step is not None:
+            step(i)
+        start = time.perf_counter()
+        draw()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+# Times whole frames of a plane, each drawn on a blank screen
+def time_display(plane, step=None):
+    def draw():
+        plane.screen.fill(WHITE)
+        plane.display()
+    return time_frames(draw, step)
+
+
+# Times the frames of an animation run by 'func(*args)', from the end of one frame to the end of the next
+def time_animation(func, *args):
+    ends = [time.perf_counter()]
+
+    def handler(surface):
+        ends.append(time.perf_counter())
+
+    shared_functions.frame_handlers.append(handler)
+    try:
+        func(*args)
+    finally:
+        shared_functions.frame_handlers.remove(handler)
+    return (np.diff(ends) * 1000).tolist()
+
+
+# Summarizes frame times in milliseconds
+def summarize(times):
+    summary = {"frames": len(times), "mean_ms": float(np.mean(times)), "max_ms": float(np.max(times))}
+    for percentile, value in zip(percentiles, np.percentile(times, percentiles)):
+        summary["p" + str(percentile) + "_ms"] = float(value)
+    return summary
+
+
+# Runs every scenario, returning their frame times by name
+def run_scenarios(screen):
+    results = {}
+    for count in display_counts:
+        results["display_" + str(count)] = time_display(make_plane(screen, count))
+
+    plane = make_plane(screen, view_count)
+    results["pan"] = time_display(plane, lambda i: plane.shift_offset(0.05 + 0.03j))
+    plane = make_plane(screen, view_count)
+    results["zoom"] = time_display(plane, lambda i: plane.set_half_range(half_range * 1.02 ** i))
+    plane = make_plane(screen, view_count)
+    results["rotate"] = time_display(plane, lambda i: plane.set_phase(0.01 * i))
+
+    # A line every other pixel, and a deep zoom where the grid phase comes from a huge offset
+    plane = make_plane(screen, 0)
+    plane.set_spacing(4 * half_range / width)
+    results["grid_dense"] = time_frames(plane.grid_layer.render)
+    plane.set_half_range(1e-200)
+    plane.set_spacing(1e-201)
+    plane.set_offset(123456.789 - 987.654j)
+    results["grid_deep_zoom"] = time_frames(plane.grid_layer.render)
+
+    # The label pass alone, over the whole view and with every point crowded around the origin
+    for count in label_counts:
+        results["labels_" + str(count)] = time_frames(make_plane(screen, count).display_coords)
+    plane = make_plane(screen, label_count, label_range)
+    results["labels"] = time_frames(plane.display_coords)
+
+    results["add"] = time_animation(cmplx_animation_utils.add, make_plane(screen, reduction_count))
+    results["mul"] = time_animation(cmplx_animation_utils.mul, make_unit_plane(screen, reduction_count))
+    results["add_parallel"] = time_animation(cmplx_animation_utils.add, make_plane(screen, parallel_reduction_count),
+                                             True)
+    results["mul_parallel"] = time_animation(cmplx_animation_utils.mul,
+                                             make_unit_plane(screen, parallel_reduction_count), True)
+    return results
+
+
+# Returns the commit the benchmark ran on, if it ran in a git checkout
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Runs the benchmarks headlessly and prints their results as JSON, or writes them to the path given as an argument
+def main():
+    screen = headless.create_screen(width, height)
+    results = run_scenarios(screen)
+    report = {"commit": get_commit(), "width": width, "height": height,
+              "scenarios": {name: summarize(times) for name, times in results.items()}}
+    output = json.dumps(report, indent=2)
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,16 @@
 import pygame as pg
+import assets
 from Button import Button
 
 # Color constants
 WHITE = (255, 255, 255)
 
-# Misc.
-image_folder_path = 'images/'
-
 
 def main():
     screen_width, screen_height, x, y, image_1_path, image_2_path = get_user_input()
     screen = create_screen(screen_width, screen_height)
-    image_1 = pg.image.load(image_folder_path + image_1_path)
-    image_2 = pg.image.load(image_folder_path + image_2_path)
+    image_1 = assets.get_image(image_1_path)
+    image_2 = assets.get_image(image_2_path)
     button = Button(screen, x, y, image_1, image_2)
     animate(button)
 
@@ -1,6 +1,11 @@
 import pygame as pg
 import numpy as np
 import cmath
+import reduction
+import double_double
+import profiler
+from Scheduler import Scheduler
+from shared_functions import update_display, mark_dirty, mark_all_dirty
 
 # Color constants
 WHITE = (255, 255, 255)
@@ -11,91 +16,165 @@ origin_radius = 10
 origin_color = (0, 0, 200)
 pt_radius = 5
 pt_color = (0, 200, 0)
-half_range_multiplier = 1.05
-phase_dist_multiplier = 100
-upper_range_limit = 1e100
-lower_range_limit = 1e-100
 
-# Stores points that should be continually displayed
+# Animation timing parameters
+fps_cap = 60
+pan_speed = 600  # pixels per second
+zoom_speed = 2  # factors of e per second
+rotation_speed = 2  # radians per second
+min_transition_duration = 0.15
+max_transition_duration = 2
+round_duration = 1.5
+
+# Range limits
+upper_range_limit = 1e290
+lower_range_limit = 1e-290
+
+# Times every transition; its 'fps_cap' may be changed to trade smoothness for CPU time
+scheduler = Scheduler(fps_cap)
+
+# Stores points that should be continually displayed, and the ones that were drawn in the last frame
 persistent_pts = []
+drawn_persistent_pts = []
+
+# Stores (anchor, point) pairs of complex plane coordinates for points which are moving during a parallel reduction
+moving_pts = []
 
 
 # Placeholder for functions which should be called during every frame of the animation
 funcs = []
 
 
-# Performs animated multiplication on all currently plotted points
-def mul(plane):
-    if plane.offset != 0:
-        center(plane)
-    sorted_pts = sorted(plane.added_coords, key=abs)
-    while len(sorted_pts) > 1:
-        prev_length = len(sorted_pts)
-        pt1, pt2 = sorted_pts[0], sorted_pts[1]
-        if pt1 == 0:
-            pt1, pt2 = pt2, pt1
-        mul_two(plane, pt1, pt2)
-        sorted_pts = sorted(plane.added_coords, key=abs)
-        if prev_length == len(sorted_pts):
-            break
+# Performs animated multiplication on all currently plotted points, and returns the reduction plan it followed. In
+# parallel mode, every disjoint pair of points is multiplied at the same time, in about log2(n) rounds.
+def mul(plane, parallel=False):
+    center(plane)
+    if parallel:
+        plan = reduction.plan_tree_product(plane.added_coords, upper_range_limit)
+        for steps in plan.rounds:
+            play_round(plane, steps, mul_path, [0, 1])
+    else:
+        plan = reduction.plan_product(plane.added_coords, upper_range_limit)
+        for step in plan.steps:
+            mul_two(plane, step.pt1, step.pt2, step.result)
     update_and_wait(plane)
+    return plan
 
 
-# Graphically multiplies two points on the complex plane
-def mul_two(plane, pt1, pt2):
+# Graphically multiplies two points on the complex plane. If the animation is stopped partway, such as by closing a
+# headless frame generator, the second point is put back so the plane still holds the same product.
+def mul_two(plane, pt1, pt2, result=None):
+    if result is None:
+        result = pt1 * pt2
     resize_to_pts(plane, [0, 1, pt1, pt2])
     if pt2 == 0 and plane.half_range * abs(pt1) >= upper_range_limit:
         plane.remove_coords(pt1)
-    elif abs(pt1 * pt2) <= upper_range_limit:
+    elif abs(result) <= upper_range_limit:
         persistent_pts.append(plane.convert_to_pixel_coords(1))
         prod_pixel_loc = plane.convert_to_pixel_coords(pt2)
         persistent_pts.append(prod_pixel_loc)
         plane.remove_coords(pt2)
+        try:
+            if pt1 != 0:
+                smooth_phase_transition(plane, plane.phase - cmath.phase(pt1))
+                smooth_half_range_transition(plane, plane.half_range * abs(pt1))
+        except Exception:
+            plane.add_coords(pt2)
+            raise
+        finally:
+            persistent_pts.clear()
         if pt1 != 0:
-            smooth_phase_transition(plane, plane.phase - cmath.phase(pt1))
-            smooth_half_range_transition(plane, plane.half_range * abs(pt1))
             plane.remove_coords(pt1)
-            plane.add_coords(pt1 * pt2)
-        persistent_pts.clear()
-
-
-# Performs animated addition on all currently plotted points
-def add(plane):
-    sorted_pts = sorted(plane.added_coords, key=abs)
-    while len(sorted_pts) > 1:
-        prev_length = len(sorted_pts)
-        current_pt = sorted_pts[0]
-        add_two(plane, current_pt, sorted_pts[1])
-        sorted_pts = sorted(plane.added_coords, key=abs)
-        if prev_length == len(sorted_pts):
-            break
+            plane.add_coords(result)
+
+
+# Performs animated addition on all currently plotted points, and returns the reduction plan it followed. In parallel
+# mode, every disjoint pair of points is added at the same time, in about log2(n) rounds.
+def add(plane, parallel=False):
+    if parallel:
+        plan = reduction.plan_tree_sum(plane.added_coords, upper_range_limit)
+        for steps in plan.rounds:
+            play_round(plane, steps, add_path, [0])
+    else:
+        plan = reduction.plan_sum(plane.added_coords, upper_range_limit)
+        for step in plan.steps:
+            add_two(plane, step.pt1, step.pt2, step.result)
     update_and_wait(plane)
+    return plan
 
 
-# Graphically adds two points on the complex plane
-def add_two(plane, pt1, pt2):
-    if abs(pt1 + pt2) <= upper_range_limit:
+# Graphically adds two points on the complex plane. If the animation is stopped partway, the second point is put back.
+def add_two(plane, pt1, pt2, result=None):
+    if result is None:
+        result = pt1 + pt2
+    if abs(result) <= upper_range_limit:
         resize_to_pts(plane, [0, pt1, pt2])
         persistent_pts.append(plane.convert_to_pixel_coords(0))
         sum_pixel_loc = plane.convert_to_pixel_coords(pt2)
         persistent_pts.append(sum_pixel_loc)
         plane.remove_coords(pt2)
-        smooth_offset_transition(plane, plane.offset - pt1.real + pt1.imag * 1j) # TODO - fix!
+        try:
+            # TODO - fix!
+            smooth_offset_transition(plane, *double_double.add((plane.offset, plane.offset_lo),
+                                                               -pt1.real + pt1.imag * 1j))
+        except Exception:
+            plane.add_coords(pt2)
+            raise
+        finally:
+            persistent_pts.clear()
         plane.remove_coords(pt1)
-        plane.add_coords(pt1 + pt2)
-        persistent_pts.clear()
+        plane.add_coords(result)
+
+
+# Animates all steps of a round of a parallel reduction at once. The plane is resized to fit the round and the 'anchors'
+# its paths are drawn from, then the second operand of every step moves along 'path' until it reaches the step's
+# result. If the round is stopped partway, the second operands are put back.
+def play_round(plane, steps, path, anchors):
+    resize_to_pts(plane, anchors + [pt for step in steps for pt in step])
+    for step in steps:
+        plane.remove_coords(step.pt2)
+    try:
+        run_transition(plane, round_duration, lambda t: move_pts(steps, path, t))
+    except Exception:
+        for step in steps:
+            plane.add_coords(step.pt2)
+        raise
+    finally:
+        moving_pts.clear()
+    for step in steps:
+        plane.remove_coords(step.pt1)
+        plane.add_coords(step.result)
+
+
+# Sets the moving points of a round to where their paths are after a fraction 't' of the round
+def move_pts(steps, path, t):
+    moving_pts[:] = [path(step, t) for step in steps]
+
+
+# The path of the second operand of a sum: it travels along the first operand, drawn from the second operand's tip
+def add_path(step, t):
+    return step.pt2, step.pt2 + step.pt1 * t
+
+
+# The path of the second operand of a product: it is rotated by the first operand's phase and scaled by its magnitude
+def mul_path(step, t):
+    if step.pt1 == 0:
+        return 0, step.pt2 * (1 - t)
+    return 0, step.pt2 * cmath.exp(t * cmath.log(step.pt1))
 
 
 # Centers the plane on the origin
 def center(plane):
-    if plane.offset != 0:
+    if plane.offset != 0 or plane.offset_lo != 0:
         resize_to_pts(plane, [0])
         smooth_offset_transition(plane, 0)
 
 
-# Resizes the plane so that all points are visible
+# Resizes the plane so that all points are visible. The size is left alone if every point is at the center.
 def resize_to_pts(plane, pts_lst):
     new_half_range = get_farthest_dist_from_center(plane, pts_lst)
+    if new_half_range == 0:
+        return
     smooth_half_range_transition(plane, new_half_range)
 
 
@@ -103,37 +182,45 @@ def resize_to_pts(plane, pts_lst):
 def get_farthest_dist_from_center(plane, pts_lst):
     largest = 0
     for pt in pts_lst:
-        if abs(pt - plane.offset) > largest:
-            largest = abs(pt - plane.offset)
+        dist = abs((pt - plane.offset) - plane.offset_lo)
+        if dist > largest:
+            largest = dist
     return largest
 
 
-# Causes a smooth transition in the offset of the complex plane animation
-def smooth_offset_transition(plane, offset):
-    dist = abs(offset - plane.offset)
-    vals = list(np.linspace(plane.offset, offset, plane.screen.get_width() / (2 * plane.half_range) * dist)) + [offset]
-    for val in vals:
-        plane.set_offset(val)
-        update_and_wait(plane)
+# Causes a smooth transition in the offset of the complex plane animation. The offset moves in double-double precision,
+# from the plane's full offset to 'offset' + 'offset_lo', so that a view panned far while zoomed in doesn't jump.
+def smooth_offset_transition(plane, offset, offset_lo=0j):
+    start = (plane.offset, plane.offset_lo)
+    distance = double_double.add(double_double.add((offset, offset_lo), -start[0]), -start[1])
+    pixel_dist = plane.view.scale_x * abs(distance[0] + distance[1])
+    run_transition(plane, pixel_dist / pan_speed, lambda t: plane.set_offset(
+        *double_double.add(double_double.add(start, distance[0] * t), distance[1] * t)))
 
 
 # Causes a smooth transition in the half range of the complex plane animation
 def smooth_half_range_transition(plane, half_range):
-    quotient = half_range / plane.half_range
-    log = abs(round(np.log(quotient) / np.log(half_range_multiplier)))
-    vals = list(np.linspace(plane.half_range, half_range, log)) + [half_range]
-    for val in vals:
-        plane.set_half_range(val)
-        update_and_wait(plane)
+    start = plane.half_range
+    quotient = half_range / start
+    run_transition(plane, abs(np.log(quotient)) / zoom_speed, lambda t: plane.set_half_range(start * quotient ** t))
 
 
 # Causes a smooth transition in the phase of the complex plane animation
 def smooth_phase_transition(plane, phase):
-    new_phase = optimal_phase(plane.phase, phase)
-    vals = np.linspace(plane.phase, new_phase, abs(phase_dist_multiplier * (new_phase - plane.phase)))
-    for val in vals:
-        plane.set_phase(val)
+    start = plane.phase
+    new_phase = optimal_phase(start, phase)
+    run_transition(plane, abs(new_phase - start) / rotation_speed,
+                   lambda t: plane.set_phase(start + (new_phase - start) * t))
+
+
+# Runs a transition lasting about 'duration' seconds, kept within the minimum and maximum transition durations
+def run_transition(plane, duration, step):
+    if duration == 0:
+        step(1)
         update_and_wait(plane)
+        return
+    duration = min(max(duration, min_transition_duration), max_transition_duration)
+    scheduler.run(duration, step, lambda: update_and_wait(plane))
 
 
 # Finds a phase which will result in the shortest travel path from 'starting_phase' to 'target_phase'
@@ -145,17 +232,36 @@ def optimal_phase(starting_phase, target_phase):
         return starting_phase + phase_dist % -cmath.tau
 
 
-# Updates the plane and pauses so the animation doesn't move too fast
+# Updates the plane for one frame of an animation. The scheduler waits between frames so the animation doesn't move too fast
 def update_and_wait(plane):
     pg.event.pump()  # Make sure pygame doesn't freeze up because the event queue isn't getting called
     plane.screen.fill(WHITE)
-    [func() for func in funcs]
+    with profiler.stage("funcs"):
+        [func() for func in funcs]
     plane.display()
-    draw_persistent_pts(plane)
-    pg.display.flip()
+    with profiler.stage("animated_pts"):
+        draw_persistent_pts(plane)
+        draw_moving_pts(plane)
+    update_display(plane.screen)
 
 
 # Draws points in the persistent points list during every frame of the animation
 def draw_persistent_pts(plane):
+    global drawn_persistent_pts
     for pt in persistent_pts:
-        pg.draw.circle(plane.screen, pt_color, pt, pt_radius)
+        rect = pg.draw.circle(plane.screen, pt_color, pt, pt_radius)
+        if pt not in drawn_persistent_pts:
+            mark_dirty(rect)
+    for pt in drawn_persistent_pts:
+        if pt not in persistent_pts:
+            mark_dirty((pt[0] - pt_radius, pt[1] - pt_radius, 2 * pt_radius + 1, 2 * pt_radius + 1))
+    drawn_persistent_pts = list(persistent_pts)
+
+
+# Draws the points which are moving during a parallel reduction, each with a line from its anchor
+def draw_moving_pts(plane):
+    for anchor, pt in moving_pts:
+        plane.draw_line(anchor, pt, pt_color)
+        pg.draw.circle(plane.screen, pt_color, plane.convert_to_pixel_coords(pt), pt_radius)
+    if moving_pts:
+        mark_all_dirty()
@@ -0,0 +1,22 @@
+import math
+
+# A double-double number is a pair (hi, lo) of floats or complex numbers whose unevaluated sum holds about twice the
+# digits of a single float. 'lo' is always small enough that adding it to 'hi' rounds back to 'hi'.
+
+
+# Adds two floats or complex numbers, returning the rounded sum and the rounding error it left out
+def two_sum(a, b):
+    total = a + b
+    b_part = total - a
+    return total, (a - (total - b_part)) + (b - b_part)
+
+
+# Adds a float or complex number to a double-double number
+def add(value, delta):
+    hi, lo = two_sum(value[0], delta)
+    return two_sum(hi, lo + value[1])
+
+
+# Returns a real double-double number modulo 'modulus', as a float in [0, modulus)
+def mod(value, modulus):
+    return (math.fmod(value[0], modulus) + math.fmod(value[1], modulus)) % modulus
@@ -0,0 +1,94 @@
+import queue
+import threading
+import pygame as pg
+import shared_functions
+from Euler import PhaseTable
+
+# Color constants
+WHITE = (255, 255, 255)
+
+# Number of finished frames which may wait for the consumer of 'frames' before rendering pauses
+frame_buffer = 2
+
+
+# Raised inside a headless animation to stop it once nobody is consuming its frames anymore
+class FramesClosed(Exception):
+    pass
+
+
+# Initializes pygame without a window and returns an off-screen screen of the given size
+def create_screen(width, height):
+    shared_functions.set_headless()
+    pg.init()
+    return shared_functions.create_screen(width, height)
+
+
+# Returns the contents of a surface as a (height, width, 3) array
+def get_frame(surface):
+    return pg.surfarray.array3d(surface).transpose(1, 0, 2)
+
+
+# Draws a complex plane on a blank screen and returns the frame
+def render(plane):
+    plane.screen.fill(WHITE)
+    plane.display()
+    return get_frame(plane.screen)
+
+
+# Runs 'func(*args)', such as an animated add or mul, and yields every frame it finishes as an array. 'func' draws on a
+# worker thread, which pygame only allows here because headless rendering goes through SDL's dummy video driver and
+# never touches a window; the caller must not draw with pygame while the frames are being consumed.
+def frames(func, *args):
+    if not shared_functions.headless:
+        raise RuntimeError("headless.frames needs the dummy video driver set up by headless.create_screen")
+    finished = queue.Queue(frame_buffer)
+    closed = threading.Event()
+    done = object()
+
+    # Waits for room to queue 'item' for the consumer. Returns False if the generator was closed in the meantime.
+    def hand_over(item):
+        while not closed.is_set():
+            try:
+                finished.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def handle_frame(surface):
+        if not hand_over(get_frame(surface)):
+            raise FramesClosed
+
+    def run():
+        try:
+            func(*args)
+            hand_over(done)
+        except FramesClosed:
+            pass
+        except Exception as error:
+            hand_over(error)
+
+    shared_functions.frame_handlers.append(handle_frame)
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    try:
+        while True:
+            frame = finished.get()
+            if frame is done:
+                return
+            if isinstance(frame, Exception):
+                raise frame
+            yield frame
+    finally:
+        closed.set()
+        worker.join()
+        shared_functions.frame_handlers.remove(handle_frame)
+
+
+# Yields 'count' frames of an Euler's formula circle, advancing its phase by 'phase_step' each frame
+def euler_frames(euler_circle, phase_step, count):
+    phase_table = PhaseTable(phase_step)
+    for step in range(1, count + 1):
+        euler_circle.display()
+        yield get_frame(euler_circle.screen)
+        euler_circle.set_step(phase_table, step % phase_table.count)
@@ -0,0 +1,166 @@
+import time
+import collections
+import importlib
+import multiprocessing
+
+# Visualizations which can be launched, by name, as (module, function)
+visualizations = {"real": ("animate_complex", "animate_real"),
+                  "complex": ("animate_complex", "animate_complex"),
+                  "euler": ("animate_euler", "animate_euler"),
+                  "epicycles": ("animate_euler", "animate_epicycles")}
+
+# Modules the visualizations need, imported by a spare worker ahead of time so the next launch doesn't wait for them
+warm_up_modules = ["numpy", "pygame", "assets", "animate_complex", "animate_euler"]
+
+# A worker process running, or waiting to run, the visualization 'name', and the launcher's end of its pipe
+Worker = collections.namedtuple("Worker", ["name", "process", "connection"])
+
+# Launcher side: the workers running visualizations, and a warmed-up worker waiting for the next launch, if any
+context = multiprocessing.get_context("spawn")
+workers = []
+spare = None
+
+# Worker side: the pipe back to the launcher, or None if the visualization was started some other way
+connection = None
+
+
+# Runs a visualization in its own process, sending its status and results to the launcher over 'conn'. If 'name' is
+# None, imports the visualizations' modules first and then waits for the launcher to say which one to run.
+#
+# Messages sent to the launcher are tuples: ("status", text), ("timing", text), ("result", operation, value, skipped),
+# ("error", text) and finally ("closed",). The launcher sends ("launch", name) to a spare worker and ("close",) to ask
+# a visualization to quit.
+def run_visualization(name, conn):
+    global connection
+    connection = conn
+    try:
+        if name is None:
+            warm_up()
+            message = conn.recv()
+            if message[0] != "launch":
+                return
+            name = message[1]
+        module, function = visualizations[name]
+        send("status", name + " opened")
+        getattr(importlib.import_module(module), function)()
+    except EOFError:
+        pass
+    except Exception as error:
+        send("error", f"{name} failed: {error!r}")
+        raise
+    finally:
+        send("closed")
+        conn.close()
+
+
+# Imports the visualizations' modules and decodes their images, reporting how long each took
+def warm_up():
+    for module in warm_up_modules:
+        start = time.perf_counter()
+        importlib.import_module(module)
+        send("timing", f"imported {module} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    start = time.perf_counter()
+    importlib.import_module("assets").preload()
+    send("timing", f"loaded images in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+# Worker side: sends a message to the launcher. Does nothing if there is no launcher or it has gone away.
+def send(*message):
+    if connection is None:
+        return
+    try:
+        connection.send(message)
+    except OSError:
+        pass
+
+
+# Worker side: checks whether the launcher has asked the visualization to close, or has gone away. Never blocks, so
+# animation loops can call it every time they wake up.
+def close_requested():
+    if connection is None:
+        return False
+    try:
+        while connection.poll():
+            if connection.recv()[0] == "close":
+                return True
+    except (EOFError, OSError):
+        return True
+    return False
+
+
+# Launcher side: starts a worker running the visualization 'name', handing it to the spare worker if there is one
+def launch(name):
+    global spare
+    if spare is not None and spare.process.is_alive():
+        try:
+            spare.connection.send(("launch", name))
+            workers.append(Worker(name, spare.process, spare.connection))
+            spare = None
+            prespawn()
+            return
+        except OSError:
+            pass
+    workers.append(start_worker(name))
+
+
+# Launcher side: starts a spare worker which warms up and then waits to be handed a visualization
+def prespawn():
+    global spare
+    if spare is None:
+        spare = start_worker(None)
+
+
+# Starts a worker process for the visualization 'name', or a spare worker if it is None. Workers aren't daemonic, since
+# a visualization may start processes of its own, such as a TiledRenderer's pool; 'close_all' stops them instead, and
+# they quit by themselves if the launcher goes away.
+def start_worker(name):
+    parent_connection, child_connection = context.Pipe()
+    process = context.Process(target=run_visualization, args=(name, child_connection))
+    process.start()
+    child_connection.close()
+    return Worker(name, process, parent_connection)
+
+
+# Launcher side: returns every message the workers have sent since the last call as (name, message) pairs, and forgets
+# the workers which have finished. Never blocks.
+def poll():
+    global spare
+    messages = []
+    for worker in workers + ([spare] if spare is not None else []):
+        finished = False
+        try:
+            while worker.connection.poll():
+                message = worker.connection.recv()
+                messages.append((worker.name, message))
+                finished = finished or message[0] == "closed"
+        except (EOFError, OSError):
+            finished = True
+        if finished or not worker.process.is_alive():
+            worker.process.join(0)
+            worker.connection.close()
+            if worker is spare:
+                spare = None
+            else:
+                workers.remove(worker)
+    return messages
+
+
+# Launcher side: asks every worker to close, waits up to 'timeout' seconds in all for them to finish, then terminates
+# the ones which haven't
+def close_all(timeout):
+    global spare
+    everyone = workers + ([spare] if spare is not None else [])
+    for worker in everyone:
+        try:
+            worker.connection.send(("close",))
+        except OSError:
+            pass
+    deadline = time.perf_counter() + timeout
+    for worker in everyone:
+        worker.process.join(max(deadline - time.perf_counter(), 0))
+        if worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join()
+        worker.connection.close()
+    workers.clear()
+    spare = None
@@ -1,5 +1,17 @@
+import sys
+import time
+
+start_time = time.perf_counter()
+
 from Menu import Menu
 
+# Passing this flag prints how long the menu takes to show up and how long the visualizations take to import
+startup_timing_flag = "--startup-timing"
+
 if __name__ == '__main__':
-    menu = Menu()
+    if startup_timing_flag in sys.argv[1:]:
+        print(f"Menu imported after {(time.perf_counter() - start_time) * 1000:.1f} ms")
+        menu = Menu(start_time)
+    else:
+        menu = Menu()
     menu.display()
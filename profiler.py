@@ -0,0 +1,128 @@
+import collections
+import contextlib
+import csv
+import time
+import numpy as np
+import pygame as pg
+import render_cache
+
+# Profiling is off by default; while it is, 'stage' hands out a shared context manager that does nothing
+enabled = False
+overlay = False
+
+# Number of recent frames the overlay's percentiles are taken over, and the most frames kept for a CSV dump
+window = 120
+history_limit = 10000
+
+# Where per-frame timings are written by 'dump_csv' when no path is given
+csv_path = "frame_times.csv"
+
+# Overlay display parameters
+overlay_font_size = 18
+overlay_line_height = 16
+overlay_margin = 6
+overlay_columns = [0, 110, 170, 230]
+overlay_width = 290
+overlay_color = (0, 0, 0)
+overlay_background = (235, 235, 235)
+
+# Area of the screen the overlay was last drawn over, or None if it isn't showing
+drawn_rect = None
+
+# Milliseconds spent in each stage during the frame being drawn, then during each recent and each recorded frame
+current = collections.defaultdict(float)
+recent = collections.defaultdict(lambda: collections.deque(maxlen=window))
+history = collections.deque(maxlen=history_limit)
+frame_start = None
+
+null_stage = contextlib.nullcontext()
+
+
+# Times a named stage of drawing a frame. Time spent in the same stage more than once in a frame is added up.
+class Stage:
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        current[self.name] += (time.perf_counter() - self.start) * 1000
+
+
+# Returns a context manager timing the stage 'name' of the current frame
+def stage(name):
+    return Stage(name) if enabled else null_stage
+
+
+# Turns profiling on, or off while discarding everything recorded so far
+def set_enabled(value):
+    global enabled, frame_start
+    enabled = value
+    frame_start = None
+    current.clear()
+    if not value:
+        recent.clear()
+        history.clear()
+
+
+# Shows or hides the overlay, profiling only while it is shown
+def toggle_overlay():
+    global overlay
+    overlay = not overlay
+    set_enabled(overlay)
+
+
+# Finishes the current frame's timings, adding the time since the previous frame finished as the stage "frame"
+def end_frame():
+    global frame_start
+    if not enabled:
+        return
+    now = time.perf_counter()
+    if frame_start is not None:
+        current["frame"] = (now - frame_start) * 1000
+    frame_start = now
+    for name, ms in current.items():
+        recent[name].append(ms)
+    history.append(dict(current))
+    current.clear()
+
+
+# Returns the rolling (p50, p95, max) of each stage's time in milliseconds, by stage name
+def summarize():
+    return {name: (float(np.percentile(times, 50)), float(np.percentile(times, 95)), max(times))
+            for name, times in sorted(recent.items()) if times}
+
+
+# Draws the rolling stage timings in the bottom left corner of a surface and returns the area which changed: the
+# overlay, along with wherever it was last drawn so that a hidden or shrunk overlay gets cleared. Returns None when the
+# overlay is hidden and there is nothing left to clear.
+def draw_overlay(surface):
+    global drawn_rect
+    if not overlay:
+        rect, drawn_rect = drawn_rect, None
+        return rect
+    font = render_cache.get_font(overlay_font_size)
+    rows = [("stage (ms)", "p50", "p95", "max")]
+    rows += [(name, f"{p50:.2f}", f"{p95:.2f}", f"{peak:.2f}") for name, (p50, p95, peak) in summarize().items()]
+    height = len(rows) * overlay_line_height + 2 * overlay_margin
+    rect = pg.Rect(0, surface.get_height() - height, overlay_width + 2 * overlay_margin, height)
+    surface.fill(overlay_background, rect)
+    for i, row in enumerate(rows):
+        for column, text in zip(overlay_columns, row):
+            surface.blit(font.render(text, True, overlay_color),
+                         (overlay_margin + column, rect.top + overlay_margin + i * overlay_line_height))
+    changed = rect if drawn_rect is None else rect.union(drawn_rect)
+    drawn_rect = rect
+    return changed
+
+
+# Writes every recorded frame's stage timings to a CSV file, one row per frame and one column per stage
+def dump_csv(path=None):
+    names = sorted({name for frame in history for name in frame})
+    with open(path or csv_path, "w", newline="") as file:
+        writer = csv.DictWriter(file, names, restval=0)
+        writer.writeheader()
+        writer.writerows(history)
@@ -0,0 +1,145 @@
+import collections
+import heapq
+import itertools
+import math
+
+# One pairwise operation of a reduction, combining 'pt1' and 'pt2' into 'result'
+Step = collections.namedtuple("Step", ["pt1", "pt2", "result"])
+
+# A planned reduction: its steps in order, its final result, and the (value, reason) pairs which were left out of it
+Plan = collections.namedtuple("Plan", ["steps", "result", "skipped"])
+
+# A planned reduction in rounds, where each round is a list of steps on disjoint values which can happen at the same time
+TreePlan = collections.namedtuple("TreePlan", ["rounds", "result", "skipped"])
+
+# A tree plan made by 'plan_rounds', along with the operands that make up its result
+RoundsPlan = collections.namedtuple("RoundsPlan", ["rounds", "result", "skipped", "result_members"])
+
+
+# Plans the addition of 'values' two at a time, always combining the two pending values of smallest magnitude. When a
+# sum would exceed 'limit', the larger value is left out. The final result is the compensated sum of every operand that
+# went into it, so it doesn't carry the rounding errors of the pairwise sums.
+def plan_sum(values, limit):
+    heap, order = make_heap(values, lambda value: [value])
+    steps = []
+    skipped = []
+    while len(heap) > 1:
+        (pt1, members1), (pt2, members2) = pop(heap), pop(heap)
+        result = pt1 + pt2
+        if abs(result) > limit:
+            skipped.append((pt2, "adding it to " + str(pt1) + " would exceed the range limit"))
+            push(heap, order, pt1, members1)
+            continue
+        steps.append(Step(pt1, pt2, result))
+        push(heap, order, result, members1 + members2)
+    if steps and heap[0][2] is steps[-1].result:
+        members = heap[0][3]
+        exact = complex(math.fsum(value.real for value in members), math.fsum(value.imag for value in members))
+        steps[-1] = steps[-1]._replace(result=exact)
+        heap[0] = heap[0][:2] + (exact, members)
+    return finish_plan(steps, skipped, heap)
+
+
+# Plans the multiplication of 'values' two at a time, always combining the two pending values of smallest magnitude.
+# The log-magnitudes of the operands are added up instead of multiplying them, so a product which would exceed 'limit'
+# is found before anything overflows, and its larger operand is left out.
+def plan_product(values, limit):
+    heap, order = make_heap(values, log_abs)
+    steps = []
+    skipped = []
+    log_limit = math.log(limit)
+    while len(heap) > 1:
+        (pt1, log_abs1), (pt2, log_abs2) = pop(heap), pop(heap)
+        if pt1 == 0:
+            pt1, pt2 = pt2, pt1
+            log_abs1, log_abs2 = log_abs2, log_abs1
+        if log_abs1 + log_abs2 > log_limit:
+            skipped.append((pt2, "multiplying it by " + str(pt1) + " would exceed the range limit"))
+            push(heap, order, pt1, log_abs1)
+            continue
+        result = pt1 * pt2
+        steps.append(Step(pt1, pt2, result))
+        push(heap, order, result, log_abs1 + log_abs2)
+    return finish_plan(steps, skipped, heap)
+
+
+# Plans the addition of 'values' in rounds. Each round sorts the pending values by magnitude and adds neighbouring pairs,
+# so n values take about log2(n) rounds. Sums which would exceed 'limit' and the final result are handled as in
+# 'plan_sum'.
+def plan_tree_sum(values, limit):
+    plan = plan_rounds(values, lambda pt1, pt2: pt1 + pt2, lambda pt1, pt2: abs(pt1 + pt2) <= limit,
+                       "adding it to ")
+    if plan.rounds:
+        last = plan.rounds[-1][-1]
+        if plan.result is last.result:
+            members = plan.result_members
+            exact = complex(math.fsum(value.real for value in members), math.fsum(value.imag for value in members))
+            plan.rounds[-1][-1] = last._replace(result=exact)
+            return TreePlan(plan.rounds, exact, plan.skipped)
+    return TreePlan(plan.rounds, plan.result, plan.skipped)
+
+
+# Plans the multiplication of 'values' in rounds, like 'plan_tree_sum'. Products which would exceed 'limit' are found
+# through log-magnitudes as in 'plan_product'. Zero is never the first operand of a pair unless both are zero.
+def plan_tree_product(values, limit):
+    log_limit = math.log(limit)
+    plan = plan_rounds(values, lambda pt1, pt2: pt1 * pt2,
+                       lambda pt1, pt2: log_abs(pt1) + log_abs(pt2) <= log_limit, "multiplying it by ")
+    return TreePlan(plan.rounds, plan.result, plan.skipped)
+
+
+# Plans a reduction in rounds of disjoint pairs. 'combine' computes the result of a pair and 'fits' checks that it stays
+# within range; when it doesn't, the larger value of the pair is left out and the smaller one carried to the next round.
+def plan_rounds(values, combine, fits, reason):
+    pending = [(value, [value]) for value in values]
+    rounds = []
+    skipped = []
+    while len(pending) > 1:
+        pending.sort(key=lambda entry: abs(entry[0]))
+        steps = []
+        carried = [pending[-1]] if len(pending) % 2 else []
+        for (pt1, members1), (pt2, members2) in zip(pending[0:-1:2], pending[1::2]):
+            if pt1 == 0:
+                pt1, pt2, members1, members2 = pt2, pt1, members2, members1
+            if not fits(pt1, pt2):
+                larger, smaller = (pt2, (pt1, members1)) if abs(pt2) >= abs(pt1) else (pt1, (pt2, members2))
+                skipped.append((larger, reason + str(smaller[0]) + " would exceed the range limit"))
+                carried.append(smaller)
+                continue
+            result = combine(pt1, pt2)
+            steps.append(Step(pt1, pt2, result))
+            carried.append((result, members1 + members2))
+        if steps:
+            rounds.append(steps)
+        pending = carried
+    result, members = pending[0] if pending else (None, [])
+    return RoundsPlan(rounds, result, skipped, members)
+
+
+# Builds a plan whose result is the single value left on the heap
+def finish_plan(steps, skipped, heap):
+    return Plan(steps, heap[0][2] if heap else None, skipped)
+
+
+# Returns a min-heap of values ordered by magnitude, and the counter which breaks ties between them by insertion order.
+# Each value carries data about it, initially 'get_data(value)'.
+def make_heap(values, get_data):
+    heap = [(abs(value), i, value, get_data(value)) for i, value in enumerate(values)]
+    heapq.heapify(heap)
+    return heap, itertools.count(len(heap))
+
+
+# Pops the value of smallest magnitude from a heap, along with its data
+def pop(heap):
+    entry = heapq.heappop(heap)
+    return entry[2], entry[3]
+
+
+# Pushes a value and its data onto a heap, after every value already in it with the same magnitude
+def push(heap, order, value, data):
+    heapq.heappush(heap, (abs(value), next(order), value, data))
+
+
+# Returns the natural log of a value's magnitude, or minus infinity for zero
+def log_abs(value):
+    return math.log(abs(value)) if value != 0 else -math.inf
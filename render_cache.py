@@ -0,0 +1,49 @@
+import collections
+import pygame as pg
+
+# Maximum number of rendered labels kept in the cache
+max_labels = 2048
+
+# Loaded fonts by size
+fonts = {}
+
+# Rendered labels by (text, size, color, real_mode), least recently used first
+labels = collections.OrderedDict()
+
+# Label cache counters
+stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+# Returns the default font at the given size, only loading it the first time it is asked for
+def get_font(size):
+    if size not in fonts:
+        fonts[size] = pg.font.Font(None, size)
+    return fonts[size]
+
+
+# Returns a rendered label, reusing an earlier render of the same text, size, color and mode if there is one
+def get_label(text, size, color, real_mode=False):
+    key = (text, size, color, real_mode)
+    if key in labels:
+        labels.move_to_end(key)
+        stats["hits"] += 1
+        return labels[key]
+    stats["misses"] += 1
+    render = get_font(size).render(text, True, color)
+    labels[key] = render
+    if len(labels) > max_labels:
+        labels.popitem(last=False)
+        stats["evictions"] += 1
+    return render
+
+
+# Forgets the loaded fonts. Must be called before pygame quits, since fonts can't be used after that.
+def clear_fonts():
+    fonts.clear()
+
+
+# Empties the label cache and resets its counters
+def clear_labels():
+    labels.clear()
+    for key in stats:
+        stats[key] = 0
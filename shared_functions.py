@@ -1,14 +1,66 @@
+import os
 import pygame as pg
+import profiler
 
 
 # Color constants
 WHITE = (255, 255, 255)
 
+# When headless, pygame renders through SDL's dummy video driver and finished frames are never shown in a window
+headless = False
+
+# Functions which are handed the screen surface every time a frame is finished
+frame_handlers = []
+
+# Areas of the screen which have changed since the last frame was shown, or 'full_update' if all of it may have
+dirty_rects = []
+full_update = True
+
+
+# Switches rendering to SDL's dummy video driver. Must be called before the pygame display is initialized.
+def set_headless():
+    global headless
+    headless = True
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+
 
 # Creates the pygame window
 def create_screen(width, height):
     global screen
     screen = pg.display.set_mode((width, height))
     screen.fill(WHITE)
+    mark_all_dirty()
     return screen
 
+
+# Records that an area of the screen has changed and must be updated in the window
+def mark_dirty(rect):
+    dirty_rects.append(pg.Rect(rect))
+
+
+# Records that the whole screen must be updated in the window, e.g. after the view changed
+def mark_all_dirty():
+    global full_update
+    full_update = True
+
+
+# Finishes a frame: passes it to the frame handlers, draws the profiler overlay if it is shown, then, unless rendering
+# is headless, updates the areas of the window which have changed. The whole window is only flipped when all of it may
+# have changed.
+def update_display(surface):
+    global full_update
+    with profiler.stage("frame_handlers"):
+        for handler in frame_handlers:
+            handler(surface)
+    overlay_rect = profiler.draw_overlay(surface)
+    if overlay_rect is not None:
+        mark_dirty(overlay_rect)
+    with profiler.stage("flip"):
+        if not headless:
+            if full_update:
+                pg.display.flip()
+            elif dirty_rects:
+                pg.display.update(dirty_rects)
+    full_update = False
+    dirty_rects.clear()
+    profiler.end_frame()